@@ -0,0 +1,49 @@
+"""
+Measures the time to read and write the vertices of a mesh with MeshNode.getPoints and setPoints.
+Run it with mayapy from the root of the repository:
+
+	mayapy benchmarks/meshPoints.py [subdivisions]
+
+The mesh is a plane with (subdivisions + 1) ^ 2 vertices, 1M by default. Prints the best time of a few runs
+of every step, for a mesh without history and for one with its polyPlane input.
+"""
+
+import os
+import sys
+import timeit
+import platform
+
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir ) )
+
+import maya.standalone
+maya.standalone.initialize()
+
+import maya.cmds         as mc
+import maya.api.OpenMaya as om
+
+from enodes import Node
+
+def measure( function, repeat=3 ):
+	"""Returns the best time in milliseconds of calling the function."""
+	return min( timeit.repeat( function, number=1, repeat=repeat ) ) * 1000.0
+
+def createMesh( subdivisions, history ):
+	transform = mc.polyPlane( sx=subdivisions, sy=subdivisions, constructionHistory=history )[0]
+	return Node( mc.listRelatives( transform, shapes=True, fullPath=True )[0] )
+
+def main( subdivisions=999 ):
+	mc.file( new=True, force=True )
+	mc.undoInfo( state=False )
+
+	for history in ( False, True ):
+		mesh   = createMesh( subdivisions, history )
+		points = mesh.getPoints()
+		moved  = points + 1.0
+
+		print( "%d vertices on Python %s, %s history" % (len(points), platform.python_version(), "with" if history else "without") )
+		print( "  getPoints              %8.1f ms" % measure( mesh.getPoints ) )
+		print( "  MPointArray( tolist )  %8.1f ms" % measure( lambda: om.MPointArray( moved.tolist() ) ) )
+		print( "  setPoints              %8.1f ms" % measure( lambda: mesh.setPoints( moved ) ) )
+
+if __name__ == "__main__":
+	main( *[int( arg ) for arg in sys.argv[1:2]] )
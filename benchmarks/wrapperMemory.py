@@ -0,0 +1,80 @@
+"""
+Measures with tracemalloc the memory of the node and attribute wrappers, the figures of the Node docstring.
+Run it with mayapy from the root of the repository:
+
+	mayapy benchmarks/wrapperMemory.py [count]
+
+Prints the bytes per instance of the wrapper itself, the maya api objects it holds not included, and of a class
+with the same attributes in a __dict__ instead of __slots__.
+"""
+
+import os
+import sys
+import platform
+import tracemalloc
+
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir ) )
+
+import maya.standalone
+maya.standalone.initialize()
+
+from enodes.node import Node, DagNode, NodeAttribute
+
+def getSlotNames( cls ):
+	"""Returns the names of the slots of the class and its bases, but __weakref__."""
+	names = []
+
+	for klass in reversed( cls.__mro__ ):
+		slots = getattr( klass, '__slots__', () )
+		names.extend( name for name in ( [slots] if isinstance( slots, str ) else slots ) if name != '__weakref__' )
+
+	return names
+
+def measure( create, count ):
+	"""Returns the bytes traced per instance while creating count instances. The list holding them is allocated
+	before tracing so it is not counted."""
+	instances = [None] * count
+
+	tracemalloc.start()
+	start = tracemalloc.get_traced_memory()[0]
+
+	for i in range( count ):
+		instances[i] = create()
+
+	size = tracemalloc.get_traced_memory()[0] - start
+	tracemalloc.stop()
+
+	return size / float( count )
+
+def createSlotted( cls ):
+	def create():
+		return object.__new__( cls )
+
+	return create
+
+def createWithDict( cls ):
+	"""Returns a function that creates instances of a class without __slots__ with the attributes of cls set."""
+	names = getSlotNames( cls )
+	klass = type( cls.__name__ +"WithDict", (object,), {} )
+
+	def create():
+		instance = klass()
+
+		for name in names:
+			setattr( instance, name, None )
+
+		return instance
+
+	return create
+
+def main( count=1000000 ):
+	print( "%d instances on Python %s" % (count, platform.python_version()) )
+
+	for cls in ( Node, DagNode, NodeAttribute ):
+		slotted  = measure( createSlotted( cls ), count )
+		withDict = measure( createWithDict( cls ), count )
+
+		print( "%-14s %4d bytes, %4d bytes with __dict__" % (cls.__name__, slotted, withDict) )
+
+if __name__ == "__main__":
+	main( *[int( arg ) for arg in sys.argv[1:2]] )
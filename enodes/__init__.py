@@ -1,7 +1,14 @@
-from .ui   import channelbox
-from .node import Node, ReferenceNode, NodeList, NodeAttribute, Namespace, registerCustomType
+try:
+	import maya.api.OpenMaya
+except ImportError:
+	# Outside maya only the modules that don't use it can be imported, like enodes.snapshot
+	pass
+else:
+	from .ui   import channelbox
+	from .node import Node, ReferenceNode, NodeList, NodeAttribute, Namespace, registerCustomType, nodeCacheInfo, clearNodeCache
+	from .modifier import Modifier, GraphEdit, GraphEditError
 
-Node.getSelectedAttrs = channelbox.get_selected_attrs
+	Node.getSelectedAttrs = channelbox.get_selected_attrs
 
-from .nodes.objectSet import ObjectSetNode
-registerCustomType( 'objectSet', ObjectSetNode )
\ No newline at end of file
+	from .nodes.objectSet import ObjectSetNode
+	registerCustomType( 'objectSet', ObjectSetNode )
\ No newline at end of file
@@ -1,5 +1,7 @@
 
-import maya.cmds as mc
+import maya.cmds             as mc
+import maya.api.OpenMaya     as om
+import maya.api.OpenMayaAnim as oma
 
 class Animation(object):
 	
@@ -83,21 +85,45 @@ class KeyframeList(object):
 		
 	@property
 	def hasConstantValue( this ):
-		
-		tKey = mc.keyframe( str(this._attribute), query=True )
-		
-		if not tKey or len(tKey) == 1:
+		"""True if there are no keys, a single key or the curves have the same value in every frame between keys."""
+
+		for curve in mc.keyframe( str(this._attribute), query=True, name=True ) or []:
+			if not KeyframeList._isConstantCurve( curve ):
+				return False
+
+		return True
+
+	@staticmethod
+	def _isConstantCurve( curve ):
+		"""Evaluates the curve with MFnAnimCurve, at the keys and at every frame between the first and the last one.
+		Curves with unitless input, like set driven keys, are evaluated at the keys and at ten points between them."""
+		sel = om.MSelectionList()
+		sel.add( curve )
+
+		fn = oma.MFnAnimCurve( sel.getDependNode( 0 ) )
+
+		if fn.numKeys < 2:
 			return True
-		
-		r     = True
-		value = mc.keyframe( str(this._attribute), time=(tKey[0],tKey[0]), q=True, eval=True )
-		
-		for t in KeyframeList._drange( tKey[1], tKey[-1], 1.0 ):
-			if value != mc.keyframe( str(this._attribute), time=(t,t), q=True, eval=True ):
-				r = False
-				break
-				
-		return r
+
+		if fn.isUnitlessInput:
+			keys   = [fn.unitlessInput(i) for i in range( fn.numKeys )]
+			inputs = list( keys )
+			value  = fn.evaluate( keys[0] )
+
+			for start, end in zip( keys, keys[1:] ):
+				inputs.extend( start + ( end - start ) * i / 10.0 for i in range( 1, 10 ) )
+
+			return all( fn.evaluate( x ) == value for x in inputs )
+
+		unit  = om.MTime.uiUnit()
+		times = [fn.input(i) for i in range( fn.numKeys )]
+		start = times[0].asUnits( unit )
+		value = fn.evaluate( times[0] )
+
+		for t in KeyframeList._drange( start + 1.0, times[-1].asUnits( unit ), 1.0 ):
+			times.append( om.MTime( t, unit ) )
+
+		return all( fn.evaluate( t ) == value for t in times )
 	
 	@staticmethod
 	def _drange( start, stop, step ):
@@ -0,0 +1,44 @@
+"""
+Maya plugin with the command used by enodes.modifier to register api edits in the undo queue.
+"""
+
+import maya.api.OpenMaya as om
+
+def maya_useNewAPI():
+	pass
+
+class UndoCommand(om.MPxCommand):
+	"""Calls the last (doIt, undoIt) pair of pending. enodes.modifier adds them through this module, as maya loads
+	it as its own module, that is not the one of the package."""
+
+	name    = "enodesUndo"
+	pending = []
+	errors  = []
+
+	@staticmethod
+	def creator():
+		return UndoCommand()
+
+	def doIt( self, args ):
+		self._doIt, self._undoIt = UndoCommand.pending.pop()
+
+		try:
+			self._doIt()
+		except Exception as e:
+			UndoCommand.errors.append( e )
+			raise
+
+	def redoIt( self ):
+		self._doIt()
+
+	def undoIt( self ):
+		self._undoIt()
+
+	def isUndoable( self ):
+		return True
+
+def initializePlugin( plugin ):
+	om.MFnPlugin( plugin ).registerCommand( UndoCommand.name, UndoCommand.creator )
+
+def uninitializePlugin( plugin ):
+	om.MFnPlugin( plugin ).deregisterCommand( UndoCommand.name )
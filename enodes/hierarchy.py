@@ -0,0 +1,196 @@
+"""
+Index of the DAG hierarchy to answer ancestor and descendant queries of many nodes without walking their paths.
+"""
+
+import weakref
+import collections
+import numpy             as np
+import maya.api.OpenMaya as om
+
+from .node import Node, NodeList, _IdentityMap, _iterDagPaths
+
+class HierarchyIndex(object):
+	"""Euler tour of the DAG built with a single MItDag traversal. Every path is a row, so instances appear once
+	per path, numbered in depth first order: the descendants of a row are the rows from the next one to its exit.
+	Nodes are found by identity, their MObject and MDagPath, like the node cache.
+
+	The index is not updated when the DAG changes. Call rebuild, or use watch=True to rebuild it on the first query
+	after a DAG change, and close to remove the callbacks."""
+
+	def __init__( self, watch=False ):
+		self._callbacks = []
+		self.rebuild()
+
+		if watch:
+			ref  = weakref.ref( self )
+			self._callbacks.append( om.MDagMessage.addAllDagChangesCallback( lambda *args: HierarchyIndex._invalidate( ref ) ) )
+
+	@staticmethod
+	def _invalidate( ref ):
+		index = ref()
+
+		if index is not None:
+			index._dirty = True
+
+	def close( self ):
+		"""Removes the DAG change callbacks."""
+		if self._callbacks:
+			om.MMessage.removeCallbacks( self._callbacks )
+			self._callbacks = []
+
+	def rebuild( self ):
+		"""Walks the DAG again."""
+		paths, parents, depths, exits, roots = [], [], [], [], []
+		rows  = _IdentityMap()
+		stack = []
+
+		for mObject, mDagPath in _iterDagPaths():
+			i     = len(paths)
+			depth = mDagPath.length()
+
+			while stack and depths[ stack[-1] ] >= depth:
+				exits[ stack.pop() ] = i - 1
+
+			parent = stack[-1] if stack else -1
+
+			paths.append( mDagPath )
+			parents.append( parent )
+			depths.append( depth )
+			exits.append( i )
+			roots.append( roots[ parent ] if parent >= 0 else i )
+
+			rows.add( mObject, mDagPath, i )
+			stack.append( i )
+
+		for j in stack:
+			exits[j] = len(paths) - 1
+
+		self._paths   = paths
+		self._rows    = rows
+		self._parents = np.array( parents, dtype=np.int64 )
+		self._depths  = np.array( depths, dtype=np.int64 )
+		self._exits   = np.array( exits, dtype=np.int64 )
+		self._roots   = np.array( roots, dtype=np.int64 )
+		self._dirty   = False
+
+	def _ensure( self ):
+		if self._dirty:
+			self.rebuild()
+
+	def __len__( self ):
+		self._ensure()
+		return len(self._paths)
+
+	@property
+	def parents( self ):
+		"""Row of the parent of every row, -1 for the nodes below the world."""
+		self._ensure()
+		return self._parents
+
+	@property
+	def depths( self ):
+		"""Length of the path of every row."""
+		self._ensure()
+		return self._depths
+
+	@property
+	def exits( self ):
+		"""Last row of the subtree of every row."""
+		self._ensure()
+		return self._exits
+
+	def index( self, node ):
+		"""Returns the row of the path of a DagNode or a name."""
+		return int( self.indices( [node] )[0] )
+
+	def indices( self, nodes ):
+		"""Returns a numpy array with the rows of the paths of the nodes, a NodeList or an iterable of DagNodes or names."""
+		self._ensure()
+
+		rows = []
+
+		for mObject, mDagPath in NodeList._iterItems( nodes ):
+			row = self._rows.get( mObject, mDagPath ) if mDagPath is not None else None
+
+			if row is None:
+				name = mDagPath.fullPathName() if mDagPath is not None else om.MFnDependencyNode( mObject ).name()
+				raise KeyError( "Node '%s' is not in the hierarchy index." % name )
+
+			rows.append( row )
+
+		return np.array( rows, dtype=np.int64 )
+
+	def node( self, index ):
+		"""Returns the DagNode of the row."""
+		self._ensure()
+		path = self._paths[ index ]
+		return Node.fromMObject( path.node(), path )
+
+	def _getNodeList( self, indices ):
+		sel = om.MSelectionList()
+
+		for i in indices:
+			sel.add( self._paths[i], False )
+
+		return NodeList.fromMSelectionList( sel )
+
+	def parent( self, node ):
+		"""Returns the parent of the node, None for the nodes below the world."""
+		i      = self.index( node )
+		parent = self._parents[i]
+
+		return self.node( parent ) if parent >= 0 else None
+
+	def root( self, node ):
+		"""Returns the top node of the path of the node."""
+		i = self.index( node )
+		return self.node( self._roots[i] )
+
+	def isAncestor( self, ancestor, node ):
+		"""True if the ancestor is above the node."""
+		a, n = self.indices( [ancestor, node] )
+		return bool( a < n <= self._exits[a] )
+
+	def isDescendant( self, nodes, ancestor ):
+		"""Returns a numpy boolean array that is True for the nodes below the ancestor."""
+		a   = self.index( ancestor )
+		idx = self.indices( nodes )
+
+		return ( idx > a ) & ( idx <= self._exits[a] )
+
+	def descendants( self, node ):
+		"""Returns the NodeList of all the paths below the node, in depth first order."""
+		i = self.index( node )
+		return self._getNodeList( range( i + 1, self._exits[i] + 1 ) )
+
+	def instances( self, node ):
+		"""Returns the NodeList of all the paths of the node, the ones below instanced parents included."""
+		i   = self.index( node )
+		sel = om.MSelectionList()
+
+		for path in om.MDagPath.getAllPathsTo( self._paths[i].node() ):
+			sel.add( path, False )
+
+		return NodeList.fromMSelectionList( sel )
+
+	def commonAncestor( self, *nodes ):
+		"""Returns the lowest node that is above or is each one of the nodes, None if they are in different trees."""
+		idx    = self.indices( nodes )
+		lo, hi = idx.min(), idx.max()
+
+		# The common ancestor of the first and the last node in depth first order is the one of all of them
+		while lo >= 0 and not hi <= self._exits[ lo ]:
+			lo = self._parents[ lo ]
+
+		return self.node( lo ) if lo >= 0 else None
+
+	def groupByRoot( self, nodes ):
+		"""Returns an ordered dict with the nodes grouped in NodeLists by the top node of their paths."""
+		idx    = self.indices( nodes )
+		roots  = self._roots[ idx ]
+		groups = collections.OrderedDict()
+
+		for root in collections.OrderedDict.fromkeys( roots.tolist() ):
+			groups[ self.node( root ) ] = self._getNodeList( idx[ roots == root ] )
+
+		return groups
@@ -0,0 +1,307 @@
+"""
+Applies MDGModifiers and other api edits as a single undoable maya command.
+The command is registered by the enodesUndo plugin, that is loaded the first time it is needed.
+"""
+
+import os
+import sys
+import contextlib
+import maya.cmds         as mc
+import maya.api.OpenMaya as om
+
+_PLUGIN  = "enodesUndo"
+_command = []
+
+def _getUndoCommand():
+	"""Returns the command class of the plugin, loading it the first time. Maya imports the plugin as a module named
+	like the file, so the class is taken from that module and not from the package, that may have another name."""
+
+	if not _command:
+		if not mc.pluginInfo( _PLUGIN, q=True, loaded=True ):
+			mc.loadPlugin( os.path.join( os.path.dirname( __file__ ), _PLUGIN +".py" ), quiet=True )
+
+		_command.append( sys.modules[ _PLUGIN ].UndoCommand )
+
+	return _command[0]
+
+def commit( doIt, undoIt ):
+	"""Calls doIt inside an undoable command. Undo calls undoIt and redo calls doIt again."""
+	command = _getUndoCommand()
+
+	command.pending.append( (doIt, undoIt) )
+
+	try:
+		mc.enodesUndo()
+	except RuntimeError:
+		# Raise the original error instead of the generic error of the command
+		if command.errors:
+			raise command.errors.pop()
+		raise
+	finally:
+		del command.pending[:]
+		del command.errors[:]
+
+def commitModifier( modifier ):
+	"""Applies the MDGModifier (or MDagModifier) as a single undo step.
+	If the modifier fails the operations it already applied are undone before raising the error."""
+
+	def doIt():
+		try:
+			modifier.doIt()
+		except Exception:
+			modifier.undoIt()
+			raise
+
+	commit( doIt, modifier.undoIt )
+
+class Modifier(object):
+	"""Queues plug writes in a single MDagModifier and applies them with one doIt as a single undo step.
+	Used as a context manager, NodeAttribute.value assignments inside the block are queued in it and applied on exit.
+	Attributes without value codec are still set with cmds.setAttr at the moment they are assigned."""
+
+	_active = []
+
+	def __init__( self ):
+		self._modifier = om.MDagModifier()
+		self._count    = 0
+
+	@staticmethod
+	def current():
+		"""Returns the innermost Modifier used as context manager, None if there is no one."""
+		return Modifier._active[-1] if Modifier._active else None
+
+	@staticmethod
+	@contextlib.contextmanager
+	def ensure():
+		"""Context manager that yields the current Modifier, or a new one that is applied on exit."""
+		current = Modifier.current()
+
+		if current is not None:
+			yield current
+		else:
+			with Modifier() as modifier:
+				yield modifier
+
+	def __enter__( self ):
+		Modifier._active.append( self )
+		return self
+
+	def __exit__( self, exc_type, exc_value, traceback ):
+		Modifier._active.remove( self )
+
+		if exc_type is None:
+			self.doIt()
+
+	def __len__( self ):
+		return self._count
+
+	@property
+	def MDGModifier( self ):
+		return self._modifier
+
+	def setValue( self, plug, codec, value ):
+		"""Queues the value of the plug using the codec of the attribute. Raises a RuntimeError like cmds.setAttr
+		if the plug is locked or connected, see _checkFreeToChange."""
+		_checkFreeToChange( plug )
+		codec.queue( self._modifier, plug, value )
+		self._count += 1
+
+	def doIt( self ):
+		"""Applies the queued operations as one undo step. The modifier can be used again after it."""
+
+		if self._count:
+			modifier       = self._modifier
+			self._modifier = om.MDagModifier()
+			self._count    = 0
+
+			commitModifier( modifier )
+
+class GraphEditError(RuntimeError):
+	"""Raised by GraphEdit with the messages of all the edits that failed in errors."""
+
+	def __init__( self, errors ):
+		super( GraphEditError, self ).__init__( "%d connection edits failed:\n%s" % ( len(errors), "\n".join( errors ) ) )
+		self.errors = errors
+
+class GraphEdit(Modifier):
+	"""Records the connect, disconnect and ensure_input calls of NodeAttribute made inside the block and applies them
+	on exit, with the values queued in the block, in one MDagModifier and one undo step.
+	All the edits are checked before applying any of them. If some of them fail nothing is applied and a
+	GraphEditError with all the failures is raised, and if the modifier fails the applied edits are undone."""
+
+	def __init__( self ):
+		super( GraphEdit, self ).__init__()
+		self._edits = []
+
+	@staticmethod
+	def current():
+		"""Returns the innermost GraphEdit used as context manager, None if there is no one."""
+		for modifier in reversed( Modifier._active ):
+			if isinstance( modifier, GraphEdit ):
+				return modifier
+
+		return None
+
+	def __len__( self ):
+		return self._count + len(self._edits)
+
+	def connect( self, source, destination, force=False ):
+		"""Records a connection. Without force fails if the destination already has an input.
+		Plugs are NodeAttributes, MPlugs or names."""
+		self._edits.append( ( "connect", source, destination, force ) )
+
+	def ensure( self, source, destination ):
+		"""Records a connection that replaces the input of the destination, if it is not already the source."""
+		self._edits.append( ( "ensure", source, destination, True ) )
+
+	def disconnect( self, destination, source=None ):
+		"""Records the disconnection of the input of the destination. If source is given it must be the input."""
+		self._edits.append( ( "disconnect", source, destination, False ) )
+
+	def doIt( self ):
+		"""Checks and applies the recorded edits and the queued values as one undo step."""
+		edits       = self._edits
+		self._edits = []
+		errors      = self._queueEdits( edits )
+
+		if errors:
+			self._modifier = om.MDagModifier()
+			self._count    = 0
+
+			raise GraphEditError( errors )
+
+		if self._count:
+			modifier       = self._modifier
+			self._modifier = om.MDagModifier()
+			self._count    = 0
+
+			try:
+				commitModifier( modifier )
+			except RuntimeError as e:
+				raise GraphEditError( [str(e)] )
+
+	def _queueEdits( self, edits ):
+		"""Queues the edits in the modifier and returns the list of errors.
+		Inputs are tracked by destination so the edits see the changes of the previous ones."""
+		inputs = {}
+		errors = []
+
+		for kind, source, destination, force in edits:
+			try:
+				dst = _getPlug( destination )
+				src = _getPlug( source ) if source is not None else None
+			except ValueError as e:
+				errors.append( str(e) )
+				continue
+
+			key   = ( om.MObjectHandle( dst.node() ).hashCode(), dst.info )
+			input = inputs[ key ] if key in inputs else _getInput( dst )
+
+			if kind == "disconnect":
+				if src is not None and input != src:
+					errors.append( "'%s' is not connected to '%s'." % (source, destination) )
+				elif input is not None:
+					self._modifier.disconnect( input, dst )
+					self._count   += 1
+					inputs[ key ]  = None
+
+				continue
+
+			if input is not None and input == src:
+				if not force:
+					errors.append( "'%s' is already connected to '%s'." % (source, destination) )
+
+				continue
+
+			if dst.isLocked:
+				errors.append( "'%s' is locked." % (destination,) )
+				continue
+
+			error = _getConnectionError( src, dst )
+
+			if error is not None:
+				errors.append( "Can't connect '%s' to '%s': %s" % (source, destination, error) )
+				continue
+
+			if input is not None:
+				if not force:
+					errors.append( "'%s' already has an incoming connection from '%s'." % (destination, input.name()) )
+					continue
+
+				self._modifier.disconnect( input, dst )
+
+			self._modifier.connect( src, dst )
+			self._count   += 1
+			inputs[ key ]  = src
+
+		return errors
+
+def _checkFreeToChange( plug ):
+	"""Raises a RuntimeError like cmds.setAttr if the plug, its parents or its children are locked or are the destination
+	of a connection. Inputs from animation curves are allowed, as setAttr sets animated attributes."""
+
+	plugs = [plug]
+
+	if plug.isCompound:
+		plugs.extend( plug.child(i) for i in range( plug.numChildren() ) )
+
+	parent = plug
+
+	while parent.isChild or parent.isElement:
+		parent = parent.parent() if parent.isChild else parent.array()
+		plugs.append( parent )
+
+	for item in plugs:
+		if item.isLocked or ( item.isDestination and not item.source().node().hasFn( om.MFn.kAnimCurve ) ):
+			raise RuntimeError( "The attribute '%s' is locked or connected and cannot be modified." % plug.name() )
+
+def _getConnectionError( source, destination ):
+	"""Returns why the source plug can't be connected to the destination plug, None if it looks possible.
+	Checks the flags of the attributes and the compatibility of their types, like connectAttr does when it fails."""
+	src = om.MFnAttribute( source.attribute() )
+	dst = om.MFnAttribute( destination.attribute() )
+
+	if not src.readable:
+		return "the source is not readable."
+	elif not dst.writable:
+		return "the destination is not writable."
+	elif not src.connectable or not dst.connectable:
+		return "the attributes are not connectable."
+	elif source.isCompound != destination.isCompound:
+		return "only one of the plugs is a compound."
+	elif source.isCompound and source.numChildren() != destination.numChildren():
+		return "the compounds have %d and %d children." % ( source.numChildren(), destination.numChildren() )
+
+	srcAttribute = source.attribute()
+	dstAttribute = destination.attribute()
+
+	# Typed data, like meshes or strings, only goes to attributes that accept its type
+	if srcAttribute.hasFn( om.MFn.kTypedAttribute ):
+		type = om.MFnTypedAttribute( srcAttribute ).attrType()
+
+		if type not in ( om.MFnData.kAny, om.MFnData.kInvalid ) and ( dstAttribute.hasFn( om.MFn.kTypedAttribute )
+			or dstAttribute.hasFn( om.MFn.kGenericAttribute ) ) and not dst.accepts( type ):
+			return "the destination doesn't accept the data of the source."
+
+	return None
+
+def _getPlug( item ):
+	"""Returns the MPlug of a NodeAttribute, a MPlug or a name. Raises a ValueError if it doesn't exist."""
+
+	if isinstance( item, om.MPlug ):
+		return item
+	elif not isinstance( item, str ):
+		return item.MPlug
+
+	sel = om.MSelectionList()
+
+	try:
+		sel.add( item )
+		return sel.getPlug( 0 )
+	except (RuntimeError, TypeError):
+		raise ValueError( "Plug '%s' doesn't exists." % item )
+
+def _getInput( plug ):
+	"""Returns the plug connected to the input of the plug, None if it has no input."""
+	source = plug.sourceWithConversion()
+	return None if source.isNull else source
@@ -4,24 +4,477 @@ pacofina@gmail.com
 """
 
 import re
+import weakref
+import collections
 import maya.cmds         as mc
 import maya.api.OpenMaya as om
 
-from .          import utils
+from .          import utils, plugs
 from .animation import KeyframeList, Animation
+from .modifier  import Modifier, GraphEdit, commit
+from .schema    import AttributeSchema
 
-_nodetypes = {}
+_nodetypes     = {}
+_resolvedTypes = {}
+_typeCallbacks = []
 
 def registerCustomType( type_name, type ):
+	"""Registers the class of the nodes of the type. It is also used for the types that inherit from it,
+	when they have no class registered, using the class of the closest registered type."""
 	_nodetypes[ type_name ] = type
+	_resolvedTypes.clear()
+
+def _getCustomType( typeName, isDag ):
+	"""Returns the class of the nodes of the type. Resolved classes are cached by type name."""
+	try:
+		return _resolvedTypes[ typeName ]
+	except KeyError:
+		pass
+
+	if not _typeCallbacks:
+		for message in ( om.MSceneMessage.kAfterPluginLoad, om.MSceneMessage.kAfterPluginUnload ):
+			_typeCallbacks.append( om.MSceneMessage.addStringArrayCallback( message, _onPluginChanged ) )
+
+	customtype = DagNode if isDag else Node
+
+	# Inherited types go from the base type to the type itself
+	for name in reversed( mc.nodeType( typeName, inherited=True, isTypeName=True ) or [typeName] ):
+		if name in _nodetypes:
+			customtype = _nodetypes[ name ]
+			break
+
+	_resolvedTypes[ typeName ] = customtype
+	return customtype
+
+def _onPluginChanged( *args ):
+	"""Plugins add and remove node types, forget everything cached by type name."""
+	_resolvedTypes.clear()
+	_derivedTypes.clear()
+	_keyableAttributes.clear()
+	_attributeSchemas.clear()
+	plugs._codecs.clear()
+
+NodeCacheInfo = collections.namedtuple( "NodeCacheInfo", ["hits", "misses", "currsize"] )
+
+class _NodeCache(object):
+	"""Weak-value cache that returns the same wrapper for the same node.
+	Keys are the MObjectHandle hash code and the MDagPath instance number (-1 for dependency nodes)."""
+
+	def __init__( self ):
+		self._instances = weakref.WeakValueDictionary()
+		self.hits       = 0
+		self.misses     = 0
+
+	@staticmethod
+	def key( handle, mDagPath ):
+		return handle.hashCode(), mDagPath.instanceNumber() if mDagPath else -1
+
+	def get( self, key, handle, mDagPath ):
+		instance = self._instances.get( key )
+
+		if instance is not None:
+			if instance._isWrapperOf( handle, mDagPath ):
+				self.hits += 1
+				return instance
+
+			# The node was deleted or the hash code was reused by another node
+			del self._instances[ key ]
+
+		self.misses += 1
+		return None
+
+	def add( self, key, instance ):
+		self._instances[ key ] = instance
+
+	def clear( self ):
+		self._instances.clear()
+		self.hits   = 0
+		self.misses = 0
+
+	def info( self ):
+		return NodeCacheInfo( self.hits, self.misses, len(self._instances) )
+
+_nodeCache = _NodeCache()
+
+class _IdentityMap(object):
+	"""Dict of values by node identity. Keys are the MObjectHandle hash code and the instance number like in the node
+	cache, but hash codes have 32 bits and can be repeated, so nodes with the same key are told apart by their MObject
+	and MDagPath. mDagPath is None to use the node without instance."""
+
+	__slots__ = ( '_items', )
+
+	def __init__( self ):
+		self._items = {}
+
+	def __len__( self ):
+		return sum( len(entries) for entries in self._items.values() )
+
+	def get( self, mObject, mDagPath, default=None ):
+		"""Returns the value of the node, default if it is not in the map."""
+		for other, otherPath, value in self._items.get( _NodeCache.key( om.MObjectHandle( mObject ), mDagPath ), () ):
+			if other == mObject and ( otherPath == mDagPath if mDagPath is not None else otherPath is None ):
+				return value
+
+		return default
+
+	def add( self, mObject, mDagPath, value=True ):
+		"""Adds the value of the node if it is not in the map yet. Returns True if it was added."""
+		key     = _NodeCache.key( om.MObjectHandle( mObject ), mDagPath )
+		entries = self._items.get( key )
+
+		if entries is None:
+			self._items[ key ] = [( mObject, mDagPath, value )]
+			return True
+
+		for other, otherPath, otherValue in entries:
+			if other == mObject and ( otherPath == mDagPath if mDagPath is not None else otherPath is None ):
+				return False
+
+		entries.append( ( mObject, mDagPath, value ) )
+		return True
+
+_attributeSchemas = {}
+
+def nodeCacheInfo():
+	"""Returns the hits, misses and current size of the node wrapper cache."""
+	return _nodeCache.info()
+
+def clearNodeCache():
+	"""Removes all the wrappers from the node cache and resets its counters."""
+	_nodeCache.clear()
+
+_derivedTypes = {}
+
+def _getDerivedTypes( type_name ):
+	"""Returns the set with the node type and all the types that inherit from it."""
+	try:
+		return _derivedTypes[ type_name ]
+	except KeyError:
+		types = frozenset( mc.nodeType( type_name, derived=True, isTypeName=True ) or [] )
+		_derivedTypes[ type_name ] = types
+		return types
+
+def _getTypeFilter( type ):
+	"""Returns a function that checks if a MObject is of the type, a type name (derived types included) or a MFn type."""
+
+	if type is None:
+		return lambda mObject: True
+	elif isinstance( type, int ):
+		return lambda mObject: mObject.hasFn( type )
+
+	types = _getDerivedTypes( type )
+	fn    = om.MFnDependencyNode()
+
+	def accept( mObject ):
+		fn.setObject( mObject )
+		return fn.typeName in types
+
+	return accept
+
+def _findNodePlug( fn, mDagPath, attribute ):
+	"""Returns the MPlug of the attribute of the node of the function set, None if the node doesn't have it.
+	For world space arrays like worldMatrix returns the element of the instance of the MDagPath."""
+
+	if not fn.hasAttribute( attribute ):
+		return None
+
+	plug = fn.findPlug( attribute, False )
+
+	if plug.isArray and mDagPath is not None and om.MFnAttribute( plug.attribute() ).worldSpace:
+		plug = plug.elementByLogicalIndex( mDagPath.instanceNumber() )
+
+	return plug
+
+_keyableAttributes = {}
+
+def _iterKeyableNodePlugs( fn ):
+	"""Yields the keyable and unlocked plugs of the node of the function set, skipping compounds and arrays but not
+	the existing elements of arrays, like listAttr with keyable=True. The static attributes that can be keyed are
+	looked up once per node type, but every plug is checked, as static attributes can be made keyable in a single node."""
+	typeName = fn.typeName
+
+	try:
+		count, attributes = _keyableAttributes[ typeName ]
+	except KeyError:
+		statics    = [fn.attribute(i) for i in range( fn.attributeCount() ) if not om.MFnAttribute( fn.attribute(i) ).dynamic]
+		count      = len(statics)
+		attributes = [a for a in statics if _isLeafAttribute( fn, a ) or _isOuterArray( a )]
+
+		_keyableAttributes[ typeName ] = count, attributes
+
+	# Dynamic attributes come after the static ones
+	dynamics = [fn.attribute(i) for i in range( count, fn.attributeCount() )]
+
+	for attribute in attributes + [a for a in dynamics if _isLeafAttribute( fn, a ) or _isOuterArray( a )]:
+		plug = fn.findPlug( attribute, False )
+
+		for leaf in _iterLeafPlugs( plug ) if plug.isArray else [plug]:
+			if leaf.isKeyable and not leaf.isLocked:
+				yield leaf
+
+def _isLeafAttribute( fn, attribute ):
+	return not fn.findPlug( attribute, False ).isCompound and not om.MFnAttribute( attribute ).array \
+		and not NodeAttributeCollection._isInArray( attribute )
+
+def _isOuterArray( attribute ):
+	return om.MFnAttribute( attribute ).array and not NodeAttributeCollection._isInArray( attribute )
+
+def _iterLeafPlugs( plug ):
+	"""Yields the plug, or the plugs below it that are not arrays nor compounds, the existing elements of arrays
+	and the children of compounds."""
+
+	if plug.isArray:
+		for i in range( plug.numElements() ):
+			for leaf in _iterLeafPlugs( plug.elementByPhysicalIndex(i) ):
+				yield leaf
+	elif plug.isCompound:
+		for i in range( plug.numChildren() ):
+			for leaf in _iterLeafPlugs( plug.child(i) ):
+				yield leaf
+	else:
+		yield plug
+
+def _getDagMatrix( path, space ):
+	"""Returns the world or the local MMatrix of the MDagPath."""
+
+	if space == "world":
+		return path.inclusiveMatrix()
+	elif space == "local":
+		return path.inclusiveMatrix() * path.exclusiveMatrixInverse()
+	else:
+		raise ValueError( "Invalid space '%s', use 'world' or 'local'." % space )
+
+def _getMatrixElements( matrix ):
+	return [matrix.getElement( r, c ) for r in range(4) for c in range(4)]
+
+def _setLocalMatrix( fn, matrix ):
+	"""Sets the translation, rotation, scale and shear of the MFnTransform so its local matrix is the matrix.
+	Keeps the pivots and the rotate axis, and the joint orient and the inverse scale of joints. The local matrix is
+	SP^-1 * S * SH * SP * ST * RP^-1 * RA * R * RP * RT * T for transforms and S * SH * RA * R * JO * IS * T for
+	joints, that must have no pivots, see _hasPivots."""
+	space   = om.MSpace.kTransform
+	isJoint = fn.object().hasFn( om.MFn.kJoint )
+	linear  = om.MMatrix( matrix )
+
+	for c in range(3):
+		linear.setElement( 3, c, 0.0 )
+
+	if isJoint:
+		linear = linear * _getJointMatrix( fn ).inverse()
+
+	# The rotation of the matrix is RA * R
+	transformation = om.MTransformationMatrix( linear )
+	rotateAxis     = fn.rotateOrientation( space ).asMatrix()
+	rotation       = om.MTransformationMatrix( rotateAxis.inverse() * transformation.rotation( True ).asMatrix() )
+
+	fn.setScale( transformation.scale( space ) )
+	fn.setShear( transformation.shear( space ) )
+	fn.setRotation( rotation.rotation( True ), space )
+	fn.setTranslation( om.MVector(), space )
+
+	# Pivots add a translation that depends on the rotation and the scale
+	offset = fn.transformation().asMatrix() if not isJoint else om.MMatrix()
+
+	fn.setTranslation( om.MVector( [matrix.getElement( 3, c ) - offset.getElement( 3, c ) for c in range(3)] ), space )
+
+def _getJointMatrix( fn ):
+	"""Returns the JO * IS part of the local matrix of the joint of the MFnTransform."""
+	node   = om.MFnDependencyNode( fn.object() )
+	orient = node.findPlug( "jointOrient", False )
+	matrix = om.MEulerRotation( *[orient.child(i).asDouble() for i in range(3)] ).asMatrix()
+
+	if node.findPlug( "segmentScaleCompensate", False ).asBool():
+		inverseScale = node.findPlug( "inverseScale", False )
+		scale        = om.MTransformationMatrix()
+		scale.setScale( [inverseScale.child(i).asDouble() for i in range(3)], om.MSpace.kTransform )
+
+		matrix = matrix * scale.asMatrixInverse()
+
+	return matrix
+
+def _hasPivots( fn ):
+	"""Returns True if the MFnTransform has pivots or pivot translations."""
+	space   = om.MSpace.kTransform
+	vectors = ( om.MVector( fn.rotatePivot( space ) ), om.MVector( fn.scalePivot( space ) ),
+		fn.rotatePivotTranslation( space ), fn.scalePivotTranslation( space ) )
+
+	return any( vector.length() > 1e-10 for vector in vectors )
+
+def _getMSpace( space ):
+	if space == "object":
+		return om.MSpace.kObject
+	elif space == "world":
+		return om.MSpace.kWorld
+	else:
+		raise ValueError( "Invalid space '%s', use 'object' or 'world'." % space )
+
+def _getValuePerNode( value, count, size ):
+	"""Returns a sequence with the value of every node. value is a single value or a sequence with one value
+	per node. A flat sequence is a single value for attributes with more than one value, like translate,
+	and so is a 4x4 sequence for matrices."""
+
+	if isinstance( value, str ) or not hasattr( value, '__len__' ):
+		return [value] * count
+
+	if size is not None and size > 1 and len(value) and not hasattr( value[0], '__len__' ):
+		return [value] * count
+
+	if size == 16 and len(value) == 4 and all( len(row) == 4 and not hasattr( row[0], '__len__' ) for row in value ):
+		return [value] * count
+
+	if len(value) != count:
+		raise ValueError( "Expected %d values, got %d." % (count, len(value)) )
+
+	return value
+
+_traversalDirections = { "upstream": om.MItDependencyGraph.kUpstream, "downstream": om.MItDependencyGraph.kDownstream }
+_traversalOrders     = { "depth": om.MItDependencyGraph.kDepthFirst, "breadth": om.MItDependencyGraph.kBreadthFirst }
+
+def _traverseGraph( roots, direction, order="depth", plugs=False, type=None, attribute=None, prune=None, depth=None ):
+	"""Yields the Nodes, or the NodeAttributes with plugs=True, connected upstream or downstream of the root MObjects.
+	See Node.traverse. The items are wrapped as they are found and every node is returned once."""
+
+	try:
+		direction = _traversalDirections[ direction ]
+		traversal = _traversalOrders[ order ]
+	except KeyError:
+		raise ValueError( "Invalid direction '%s' or order '%s'." % (direction, order) )
+
+	# The iterator visits every node once, breadth first it is found at its shortest distance
+	if depth is not None:
+		traversal = om.MItDependencyGraph.kBreadthFirst
+
+	level      = om.MItDependencyGraph.kPlugLevel if plugs else om.MItDependencyGraph.kNodeLevel
+	accept     = _getTypeFilter( type )
+	attributes = [attribute] if isinstance( attribute, str ) else attribute
+	fn         = om.MFnDependencyNode()
+	visited    = _IdentityMap()
+
+	for root in roots:
+		it        = om.MItDependencyGraph( root, om.MFn.kInvalid, direction, traversal, level )
+		distances = _IdentityMap()
+		distances.add( root, None, 0 )
+
+		# The first item is the root itself
+		if not it.isDone() and it.currentNode() == root:
+			it.next()
+
+		while not it.isDone():
+			mObject  = it.currentNode()
+			distance = _getTraversalDistance( mObject, direction, distances ) if depth is not None else None
+
+			# Nodes past the depth are not returned nor walked
+			if distance is not None and distance > depth:
+				it.prune()
+				it.next()
+				continue
+
+			plug  = it.currentPlug() if plugs else None
+			found = accept( mObject )
+
+			if found and attributes:
+				if plugs:
+					fnAttribute = om.MFnAttribute( plug.attribute() )
+					found       = fnAttribute.name in attributes or fnAttribute.shortName in attributes
+				else:
+					fn.setObject( mObject )
+					found = any( fn.hasAttribute( a ) for a in attributes )
+
+			if found and not plugs:
+				found = visited.add( mObject, None )
+
+			item = None
+
+			if found or prune is not None:
+				node = Node.fromMObject( mObject )
+				item = NodeAttribute( node, None, plug ) if plugs else node
+
+			if found:
+				yield item
+
+			if prune is not None and prune( item ):
+				it.prune()
+			elif distance is not None and distance >= depth:
+				it.prune()
+
+			it.next()
+
+def _getTraversalDistance( mObject, direction, distances ):
+	"""Returns the number of connections from the root to the node found by a breadth first MItDependencyGraph, one
+	more than the closest node already found that is connected to it from the side the traversal comes from.
+	distances is the _IdentityMap with the distances of the nodes found, the node is added to it."""
+	distance = distances.get( mObject, None )
+
+	# Plug level traversals find the node again for every plug
+	if distance is not None:
+		return distance
+
+	upstream = direction == om.MItDependencyGraph.kUpstream
+
+	for plug in om.MFnDependencyNode( mObject ).getConnections():
+		for other in plug.connectedTo( not upstream, upstream ):
+			found = distances.get( other.node(), None )
+
+			if found is not None and ( distance is None or found + 1 < distance ):
+				distance = found + 1
+
+	# Not connected to any node found, not expected in a breadth first traversal
+	if distance is None:
+		distance = len(distances)
+
+	distances.add( mObject, None, distance )
+	return distance
+
+def _iterDependencyNodes( fnType=om.MFn.kInvalid ):
+	"""Yields the MObject and the MDagPath (None for dependency nodes) of every node in the scene."""
+	it = om.MItDependencyNodes( fnType )
+
+	while not it.isDone():
+		mObject = it.thisNode()
+
+		if not mObject.hasFn( om.MFn.kWorld ):
+			if mObject.hasFn( om.MFn.kDagNode ):
+				yield mObject, om.MDagPath.getAPathTo( mObject )
+			else:
+				yield mObject, None
+
+		it.next()
+
+_dagTraversals = { "depth": om.MItDag.kDepthFirst, "breadth": om.MItDag.kBreadthFirst }
+
+def _iterDagPaths( fnType=om.MFn.kInvalid, root=None, traversal=om.MItDag.kDepthFirst ):
+	"""Yields the MObject and the MDagPath of every DAG path below the root, instances included.
+	The root itself is not returned."""
+	it = om.MItDag( traversal, fnType )
+
+	if root is not None:
+		it.reset( root, traversal, fnType )
+
+	while not it.isDone():
+		mObject = it.currentItem()
+
+		if not mObject.hasFn( om.MFn.kWorld ) and ( root is None or it.depth() > 0 ):
+			yield mObject, it.getPath()
+
+		it.next()
 
 class Node(object):
+	"""Wrapper of a maya dependency node. Maya attributes are available as python attributes or items.
+
+	Wrappers use __slots__ to stay small when millions of them are alive. Measured with tracemalloc over
+	1M instances on Python 3.11 the wrapper itself (the maya api objects not included) takes 80 bytes
+	instead of 112 bytes, 88 instead of 128 for a DagNode and 56 instead of 96 for a NodeAttribute.
+	The saving is bigger on python versions that don't inline the instance __dict__.
+	The figures are printed by benchmarks/wrapperMemory.py."""
+
+	__slots__ = ( '_MObject', '_MObjectHandle', '_MFnDependencyNode', '_attributeSchemas', '_plugs', '__weakref__' )
 
 	@staticmethod
 	def ls( *args, **kwArgs ):
 		ls = mc.ls( *args, **kwArgs )
-			
-		return NodeList( ls )
+		
+		# Nodes returned by ls always exist, no need to check every name
+		return NodeList( ls, skipMissing=True )
 
 	@staticmethod
 	def one( *args, **kvArgs ):
@@ -39,27 +492,86 @@ class Node(object):
 	def create( type, **args ):
 		return Node( mc.createNode( type, **args ) )
 
+	@staticmethod
+	def query( type=None, namespace=None, referenced=None, attribute=None, where=None, dag=False ):
+		"""Walks the scene in a single pass with the maya iterators and yields the nodes that pass all the filters.
+
+		type       -- node type name (derived types included) or a MFn type constant used as native iterator filter.
+		namespace  -- namespace of the nodes, ":" for the root namespace.
+		referenced -- True or False to return only referenced or not referenced nodes.
+		attribute  -- name of an attribute that the nodes must have.
+		where      -- callable that receives the MFnDependencyNode of each node and returns True to keep it.
+		dag        -- walks the DAG instead of the dependency graph, returning every instance of the DAG nodes."""
+
+		isFnType  = isinstance( type, int )
+		fnType    = type if isFnType else om.MFn.kInvalid
+		typeNames = _getDerivedTypes( type ) if type and not isFnType else None
+
+		# The root namespace is stored as None by utils.splitName
+		filterNamespace = namespace is not None
+		namespace       = namespace.strip(":") or None if filterNamespace else None
+
+		items = _iterDagPaths( fnType ) if dag else _iterDependencyNodes( fnType )
+		fn    = om.MFnDependencyNode()
+
+		for mObject, mDagPath in items:
+			fn.setObject( mObject )
+
+			if typeNames is not None and fn.typeName not in typeNames:
+				continue
+
+			if filterNamespace and utils.splitName( fn.name() )[1] != namespace:
+				continue
+
+			if referenced is not None and fn.isFromReferencedFile != referenced:
+				continue
+
+			if attribute is not None and not fn.hasAttribute( attribute ):
+				continue
+
+			if where is not None and not where( fn ):
+				continue
+
+			yield Node.fromMObject( mObject, mDagPath )
+
 	@staticmethod
 	def fromMObject( mObject, mDagPath=None ):
-		
+		"""Returns the wrapper of the node. The same instance is returned while the node is alive.
+		When mDagPath is not given for a DAG node the first path to the node is used."""
+		if mDagPath is None and mObject.hasFn( om.MFn.kDagNode ):
+			mDagPath = om.MDagPath.getAPathTo( mObject )
+
+		handle   = om.MObjectHandle( mObject )
+		key      = _NodeCache.key( handle, mDagPath )
+		instance = _nodeCache.get( key, handle, mDagPath )
+
+		if instance is not None:
+			return instance
+
 		dependencyNode = om.MFnDependencyNode( mObject )
-		
+		customtype     = _getCustomType( dependencyNode.typeName, bool(mDagPath) )
+		instance       = object.__new__( customtype )
+
 		if mDagPath:
-			customtype = _nodetypes.get( dependencyNode.typeName, DagNode )
-			instance   = object.__new__( customtype )
 			instance.__constructor__( mObject, dependencyNode, mDagPath )
 		else:
-			customtype = _nodetypes.get( dependencyNode.typeName, Node )
-			instance   = object.__new__( customtype )
 			instance.__constructor__( mObject, dependencyNode )
-			
+
+		_nodeCache.add( key, instance )
+
 		return instance
 
 	def __constructor__( self, mObject, mFnDependencyNode ):
 		self._MObject           = mObject
 		self._MObjectHandle     = om.MObjectHandle( mObject )
 		self._MFnDependencyNode = mFnDependencyNode
-	
+		self._attributeSchemas  = None
+		self._plugs             = None
+
+	def _isWrapperOf( self, handle, mDagPath ):
+		"""Returns True if this instance still wraps the node of the handle."""
+		return self._MObjectHandle.isValid() and self._MObject == handle.object()
+
 	def __new__(self, name ):
 		mObject, mDagPath = next( utils.iter_MObjectAndMDagPath( name ) )
 		return Node.fromMObject( mObject, mDagPath )
@@ -78,9 +590,16 @@ class Node(object):
 		return self.attributes[ attribute ]
 
 	def __getattr__( self, attribute ):
+		# Private and special names are never maya attributes, don't query the node for them
+		if attribute[0] == '_':
+			raise AttributeError( attribute )
+
 		return self.attributes[ attribute ]
 	
 	def __eq__( self, other ):
+		if isinstance( other, Node ):
+			return self is other or self._isSameNode( other )
+
 		return str(self) == str(other)
 
 	def __ne__( self, other ):
@@ -89,6 +608,9 @@ class Node(object):
 	def __lt__( self, other ):
 		return str(self).__lt__( str(other) )
 
+	def _isSameNode( self, other ):
+		return self._MObject == other._MObject and not isinstance( other, DagNode )
+
 	def __hash__( self ):
 		return self._MObjectHandle.hashCode()
 	
@@ -161,6 +683,62 @@ class Node(object):
 	@property
 	def attrs( self ):
 		return self.attributes
+
+	def _getAttributeSchema( self, plug ):
+		"""Returns the AttributeSchema of the plug. Static attributes share the schema with all the nodes of the same type.
+		Schemas of dynamic attributes are created again when the attribute was replaced by another one with its name."""
+		attribute = plug.attribute()
+
+		if plug.isDynamic:
+			if self._attributeSchemas is None:
+				self._attributeSchemas = {}
+
+			schemas = self._attributeSchemas
+			key     = ( om.MFnAttribute( attribute ).name, plug.isArray )
+		else:
+			schemas = _attributeSchemas
+			key     = ( self._MFnDependencyNode.typeName, om.MFnAttribute( attribute ).name, plug.isArray )
+
+		schema = schemas.get( key )
+
+		if schema is None or ( plug.isDynamic and schema.MObject != attribute ):
+			schema = schemas[ key ] = AttributeSchema( attribute )
+
+		return schema
+
+	def _findPlug( self, attribute ):
+		"""Returns the MPlug of the attribute or None if the node doesn't have it.
+		Plugs of attribute names are cached, compound paths, indices and aliases are resolved every time.
+		Cached plugs are checked against the attribute of the node with the name, as dynamic attributes can be
+		deleted, renamed or replaced with cmds, undo or reference edits."""
+
+		plugs = self._plugs
+		fn    = self._MFnDependencyNode
+
+		if plugs is None:
+			plugs = self._plugs = {}
+		else:
+			plug = plugs.get( attribute )
+
+			if plug is not None:
+				if fn.hasAttribute( attribute ) and fn.attribute( attribute ) == plug.attribute():
+					return plug
+
+				del plugs[ attribute ]
+
+		if fn.hasAttribute( attribute ):
+			plug = plugs[ attribute ] = fn.findPlug( attribute, False )
+			return plug
+
+		try:
+			return next( utils.iter_MPlugs( str(self) +"."+ attribute ) )
+		except (ValueError, TypeError):
+			return None
+
+	def _resetAttributes( self ):
+		"""Forgets the cached plugs and the data of the dynamic attributes. Called when attributes are added, removed or renamed."""
+		self._attributeSchemas = None
+		self._plugs            = None
 	
 	@property
 	def attributes( self ):
@@ -182,6 +760,26 @@ class Node(object):
 	def inputs( self ):
 		return NodeConnectionList( self, destination=False )
 
+	def traverse( self, direction="upstream", order="depth", plugs=False, type=None, attribute=None, prune=None, depth=None ):
+		"""Yields the nodes connected upstream or downstream of this one, walking the dependency graph with MItDependencyGraph.
+
+		order is "depth" or "breadth" first. With plugs=True yields the NodeAttributes of the connected plugs instead.
+		type filters by a type name (derived types included) or a MFn type, and attribute by the name or names of an
+		attribute that the nodes, or the plugs, must have. Nodes that don't pass the filters are still traversed.
+		prune is called with every node, or NodeAttribute, and the traversal doesn't go past it when it returns True.
+		depth limits the number of connections from this node, 1 returns only the nodes connected to it directly
+		and 0 returns nothing. With depth the graph is walked breadth first, whatever the order, so nodes are found
+		through their shortest connection. The graph is walked while the items are consumed."""
+		return _traverseGraph( [self._MObject], direction, order, plugs, type, attribute, prune, depth )
+
+	def upstream( self, **kwargs ):
+		"""Yields the nodes upstream of this one. See traverse."""
+		return self.traverse( "upstream", **kwargs )
+
+	def downstream( self, **kwargs ):
+		"""Yields the nodes downstream of this one. See traverse."""
+		return self.traverse( "downstream", **kwargs )
+
 	def getInputs( self, **args ):
 		return NodeList( [str(self)] ).getInputs( **args )
 
@@ -234,6 +832,8 @@ class Node(object):
 
 class ReferenceNode(Node):
 
+	__slots__ = ()
+
 	@staticmethod
 	def fromFile( filename ):
 		"""
@@ -343,12 +943,20 @@ class ReferenceNode(Node):
 			it.next()
 
 class DagNode(Node):
+
+	__slots__ = ( '_MDagPath', )
 	
 	def __constructor__( self, mObject, mFnDependencyNode, mDagPath ):
 		super( DagNode, self ).__constructor__( mObject, mFnDependencyNode )
 
 		self._MDagPath = mDagPath
 
+	def _isWrapperOf( self, handle, mDagPath ):
+		return super( DagNode, self )._isWrapperOf( handle, mDagPath ) and self._MDagPath.isValid() and self._MDagPath == mDagPath
+
+	def _isSameNode( self, other ):
+		return isinstance( other, DagNode ) and self._MDagPath == other._MDagPath
+
 	def __str__( self ):
 		return self._MDagPath.partialPathName()
 
@@ -362,19 +970,21 @@ class DagNode(Node):
 
 	@property
 	def root( self ):
-		parent = self.parent
+		"""Returns the top node of the path of this node."""
+		path = om.MDagPath( self._MDagPath )
 
-		if parent:
-			return parent.root
-		else:
+		if path.length() <= 1:
 			return self
+
+		path.pop( path.length() - 1 )
+		return Node.fromMObject( path.node(), path )
 	
 	@property
 	def parent( self ):
-		p = mc.listRelatives( str(self), parent=True, path=True )
+		path = om.MDagPath( self._MDagPath ).pop()
 
-		if p:
-			return Node( p[0] )
+		if path.length():
+			return Node.fromMObject( path.node(), path )
 		else:
 			return None
 			
@@ -415,43 +1025,88 @@ class DagNode(Node):
 
 	@property
 	def children( self ):
-		return NodeList( mc.listRelatives( str(self), path=True ) )
+		"""Returns the list of the children, shapes included, with the paths below the path of this node."""
+		path = self._MDagPath
+		sel  = om.MSelectionList()
+
+		for i in range( path.childCount() ):
+			sel.add( om.MDagPath( path ).push( path.child(i) ), False )
+
+		return NodeList.fromMSelectionList( sel )
 
 	def isChildOf( self, node ):
-		p = self._MDagPath.pop()
-		r = False
+		"""True if the node is above this one in its path."""
+		p = om.MDagPath( self._MDagPath )
 
-		while p and not r:
-			r = p == node._MDagPath
-			p = p.pop() if not r and p.length() > 1 else None
+		while p.length() > 1:
+			if p.pop() == node._MDagPath:
+				return True
 
-		return r
+		return False
 
 	@property
 	def isShape( self ):
-		return mc.objectType( str(self), isAType="shape")
+		return self._MObject.hasFn( om.MFn.kShape )
 
 	@property
 	def shapes( self ):
-		return NodeList( mc.listRelatives( str(self), shapes=True, ni=True, path=True ) )
+		"""Returns the list of the shapes below this node that are not intermediate objects."""
+		return NodeList.fromMSelectionList( DagNode._getShapePaths( self._MDagPath ) )
+
+	@staticmethod
+	def _getShapePaths( path, sel=None ):
+		"""Adds the paths of the shapes below the path that are not intermediate objects to the selection list."""
+		sel = sel if sel is not None else om.MSelectionList()
+		fn  = om.MFnDagNode()
+
+		for i in range( path.numberOfShapesDirectlyBelow() ):
+			shape = om.MDagPath( path ).extendToShape( i )
+			fn.setObject( shape )
+
+			if not fn.isIntermediateObject:
+				sel.add( shape, False )
+
+		return sel
 	
 	# Returns an iterator
 	def getShapes( self, recursive=False ):
-		
-		if recursive:
-			childs = mc.listRelatives( str(self), type="transform" )
+		"""Yields the shapes that are not intermediate objects of this node and, with recursive, of all the nodes below."""
 
-			# Children Shapes
-			if childs:
-				for child in childs:
-					for shape in Node( child ).getShapes( True ):
-						yield shape
+		if not recursive:
+			for shape in self.shapes:
+				yield shape
+			return
 
-		# Shapes
-		for shape in self.shapes:
-			yield shape
+		fn = om.MFnDagNode()
+
+		for mObject, mDagPath in _iterDagPaths( om.MFn.kShape, root=self._MDagPath ):
+			fn.setObject( mDagPath )
+
+			if not fn.isIntermediateObject:
+				yield Node.fromMObject( mObject, mDagPath )
+
+	def descendants( self, type=None, order="depth" ):
+		"""Yields the nodes below this one with a single MItDag traversal, instances included.
+		type is a type name (derived types included) or a MFn type, and order is "depth" or "breadth" first."""
+
+		try:
+			traversal = _dagTraversals[ order ]
+		except KeyError:
+			raise ValueError( "Invalid order '%s'." % order )
+
+		if type is None or isinstance( type, int ):
+			paths = _iterDagPaths( type or om.MFn.kInvalid, root=self._MDagPath, traversal=traversal )
+		else:
+			accept = _getTypeFilter( type )
+			paths  = ( item for item in _iterDagPaths( root=self._MDagPath, traversal=traversal ) if accept( item[0] ) )
+
+		for mObject, mDagPath in paths:
+			yield Node.fromMObject( mObject, mDagPath )
 
 class MeshNode(DagNode):
+	"""Mesh shape. Vertex data is read and written as numpy arrays, in object or world space."""
+
+	__slots__ = ()
 	
 	def createIntermediateObject( self ):
 		plug    = self._MFnDependencyNode.findPlug("outMesh", False)
@@ -461,7 +1116,135 @@ class MeshNode(DagNode):
 		fn.setName( self._MFnDependencyNode.name() +"Orig" )
 		fn.isIntermediateObject = True
 		
-		return MeshNode(mObject=mObject, mDagPath=fn.getAllPaths()[0])
+		return Node.fromMObject( mObject, fn.getAllPaths()[0] )
+
+	@property
+	def MFnMesh( self ):
+		return om.MFnMesh( self._MDagPath )
+
+	def _get_api1_MFnMesh( self ):
+
+		import maya.OpenMaya as api1
+
+		list = api1.MSelectionList()
+		list.add( self._MDagPath.fullPathName() )
+		path = api1.MDagPath()
+		list.getDagPath( 0, path )
+
+		return api1.MFnMesh( path )
+
+	@staticmethod
+	def _getRawPoints( fn ):
+		"""Returns a numpy array shaped (V, 3) that views the float buffer with the vertices of the api1 MFnMesh.
+		The view is only valid until the mesh changes and must not be written, the buffer is the data of the mesh."""
+		import ctypes
+		import numpy as np
+
+		count  = fn.numVertices()
+		buffer = ( ctypes.c_float * ( count * 3 ) ).from_address( int( fn.getRawPoints() ) )
+
+		return np.ctypeslib.as_array( buffer ).reshape( count, 3 )
+
+	def _getSpaceMatrix( self, space, inverse=False ):
+		"""Returns the numpy 4x4 matrix from object to world space, None for object space."""
+		import numpy as np
+
+		if space == "object":
+			return None
+		elif space == "world":
+			matrix = self._MDagPath.inclusiveMatrixInverse() if inverse else self._MDagPath.inclusiveMatrix()
+			return np.array( _getMatrixElements( matrix ) ).reshape( 4, 4 )
+		else:
+			raise ValueError( "Invalid space '%s', use 'object' or 'world'." % space )
+
+	@property
+	def points( self ):
+		return self.getPoints()
+
+	@points.setter
+	def points( self, value ):
+		self.setPoints( value )
+
+	def getPoints( self, space="object" ):
+		"""Returns a numpy array shaped (V, 3) with the positions of the vertices, copied from the vertex buffer of the mesh."""
+		import numpy as np
+
+		matrix = self._getSpaceMatrix( space )
+		points = MeshNode._getRawPoints( self._get_api1_MFnMesh() ).astype( np.float64 )
+
+		if matrix is not None:
+			points = points.dot( matrix[:3, :3] ) + matrix[3, :3]
+
+		return points
+
+	def setPoints( self, points, space="object" ):
+		"""Sets the positions of the vertices from an array shaped (V, 3) in one undo step with MFnMesh.setPoints,
+		that dirties the outputs of the mesh. Meshes with an input connection store the positions as tweaks.
+		The vertex buffer is only used to read, benchmarks/meshPoints.py prints the time of both."""
+		import numpy as np
+
+		matrix = self._getSpaceMatrix( space, inverse=True )
+		values = np.asarray( points, dtype=np.float64 ).reshape( -1, 3 )
+
+		if matrix is not None:
+			values = values.dot( matrix[:3, :3] ) + matrix[3, :3]
+
+		count = self._get_api1_MFnMesh().numVertices()
+
+		if len(values) != count:
+			raise ValueError( "Expected %d points, got %d." % (count, len(values)) )
+
+		old  = self.getPoints()
+		path = self._MDagPath
+
+		def write( values ):
+			om.MFnMesh( path ).setPoints( om.MPointArray( values.tolist() ) )
+
+		commit( lambda: write( values ), lambda: write( old ) )
+
+	def getNormals( self, space="object", angleWeighted=False ):
+		"""Returns a numpy array shaped (V, 3) with the normals of the vertices."""
+		import numpy as np
+		return np.array( self.MFnMesh.getVertexNormals( angleWeighted, _getMSpace( space ) ), dtype=np.float64 ).reshape( -1, 3 )
+
+	def getFaceVertexNormals( self, space="object" ):
+		"""Returns a numpy array shaped (FV, 3) with the normals of the face vertices, in the order of the face vertex indices."""
+		import numpy as np
+
+		fn          = self.MFnMesh
+		normals     = np.array( fn.getNormals( _getMSpace( space ) ), dtype=np.float64 ).reshape( -1, 3 )
+		counts, ids = fn.getNormalIds()
+
+		return normals[ np.array( ids, dtype=np.int64 ) ]
+
+	def getFaceVertices( self ):
+		"""Returns two numpy arrays, the number of vertices of every face and the vertex indices of all the faces."""
+		import numpy as np
+
+		counts, ids = self.MFnMesh.getVertices()
+		return np.array( counts, dtype=np.int64 ), np.array( ids, dtype=np.int64 )
+
+	def getUVs( self, uvSet=None ):
+		"""Returns a numpy array shaped (U, 2) with the coordinates of the uv set, by default the current one."""
+		import numpy as np
+
+		us, vs = self.MFnMesh.getUVs( uvSet ) if uvSet else self.MFnMesh.getUVs()
+		return np.column_stack( ( np.array( us, dtype=np.float64 ), np.array( vs, dtype=np.float64 ) ) )
+
+	def getUVIndices( self, uvSet=None ):
+		"""Returns two numpy arrays, the number of uvs of every face and the uv indices of the face vertices.
+		Faces without uvs have 0 uvs."""
+		import numpy as np
+
+		counts, ids = self.MFnMesh.getAssignedUVs( uvSet ) if uvSet else self.MFnMesh.getAssignedUVs()
+		return np.array( counts, dtype=np.int64 ), np.array( ids, dtype=np.int64 )
+
+	@property
+	def topology( self ):
+		"""Returns the MeshTopology with the faces, edges and adjacency of the mesh in numpy arrays.
+		It is cached until the topology of the mesh changes."""
+		from . import topology
+		return topology.getTopology( self )
 
 registerCustomType( 'reference', ReferenceNode )
 registerCustomType( 'mesh', MeshNode )
@@ -469,18 +1252,21 @@ registerCustomType( 'mesh', MeshNode )
 
 class NodeAttribute(object):
 
+	__slots__ = ( '_node', '_plug', '_attribute' )
+
 	@staticmethod
 	def fromName( name ):
 		p = name.index('.')
 		return NodeAttribute( Node( name[ :p ] ), name[ p+1: ] )
 	
-	def __init__( self, node, attribute ):
+	def __init__( self, node, attribute, plug=None ):
+		"""attribute can be None when the plug is given, the name is then computed from the plug when needed."""
 		self._node      = node
-		self._plug      = None
+		self._plug      = plug
 		self._attribute = attribute
 
 	def __str__( self ):
-		return str(self._node) +"."+ self._attribute
+		return str(self._node) +"."+ self.name
 
 	def __repr__(self):
 		return str(self)
@@ -494,17 +1280,106 @@ class NodeAttribute(object):
 			raise TypeError()
 
 	def __getattr__( self, name ):
-		return NodeAttribute( self._node, self._attribute +"."+ name )
+		if name[0] == '_':
+			raise AttributeError( name )
+
+		plug = self._getPlugOrNone()
+		fn   = self._node._MFnDependencyNode
+
+		if plug is not None and plug.isCompound and not plug.isArray and fn.hasAttribute( name ):
+			attribute = fn.attribute( name )
+
+			if om.MFnAttribute( attribute ).parent == plug.attribute():
+				return NodeAttribute( self._node, None, plug.child( attribute ) )
+
+		return NodeAttribute( self._node, self.name +"."+ name )
 
 	def _getByIndex( self, index ):
-		return NodeAttribute( self._node, self._attribute +"[%d]" % index )
+		return self.getElement( index )
+
+	def getElement( self, index, physical=False ):
+		"""Returns the element of an array attribute by logical index or, with physical, by physical index."""
+		plug = self._getPlugOrNone()
+
+		if plug is not None and plug.isArray:
+			element = plug.elementByPhysicalIndex( index ) if physical else plug.elementByLogicalIndex( index )
+			return NodeAttribute( self._node, None, element )
+		elif physical:
+			raise TypeError( "Attribute '%s' is not an array." % self )
+
+		return NodeAttribute( self._node, self.name +"[%d]" % index )
+
+	def _getPlugOrNone( self ):
+		if self._plug is None:
+			self._plug = self._node._findPlug( self._attribute )
+
+		return self._plug
 
 	def __iter__( self ):
-		indexes = mc.getAttr( str(self), multiIndices=True ) or range( mc.getAttr( str(self), size=True ) )
-		
-		if indexes:
-			for index in indexes:
-				yield self._getByIndex( index )
+		"""Iterates the existing elements of an array attribute. Elements get their MPlug attached."""
+		plug = self.MPlug
+
+		if not plug.isArray:
+			raise TypeError( "Attribute '%s' is not an array." % self )
+
+		for i in range( plug.numElements() ):
+			yield NodeAttribute( self._node, None, plug.elementByPhysicalIndex( i ) )
+
+	@property
+	def indices( self ):
+		"""Returns the logical indices of the existing elements of an array attribute."""
+		return list( self.MPlug.getExistingArrayAttributeIndices() )
+
+	@property
+	def values( self ):
+		"""Returns a numpy array with the values of the existing elements of an array attribute, in the order of
+		their logical indices, see indices. The array is shaped (n,) for scalar elements and (n, k) for compounds
+		like double3, also when there are no elements."""
+		import numpy as np
+
+		plug  = self.MPlug
+		count = plug.numElements()
+
+		if not count:
+			size = self._getElementCodec( plug.elementByLogicalIndex(0) ).size
+			return np.zeros( (0, size) if size > 1 else 0 )
+
+		get    = self._getElementCodec( plug.elementByPhysicalIndex(0) ).get
+		values = np.array( [get( plug.elementByPhysicalIndex(i) ) for i in range( count )], dtype=float )
+
+		return values
+
+	def setValues( self, values, indices=None ):
+		"""Sets the elements of an array attribute in a single undo step, or queues them in the current Modifier.
+		indices are the logical indices of the values. By default they are the indices of the existing elements,
+		like values returns them, when there are as many elements as values, and 0 to len(values) - 1 otherwise."""
+
+		plug = self.MPlug
+
+		if indices is None:
+			indices = plug.getExistingArrayAttributeIndices()
+
+			if len(indices) != len(values):
+				indices = range( len(values) )
+		elif len(indices) != len(values):
+			raise ValueError( "Expected %d values, got %d." % (len(indices), len(values)) )
+
+		if not len(values):
+			return
+
+		codec = self._getElementCodec( plug.elementByLogicalIndex( int(indices[0]) ) )
+
+		with Modifier.ensure() as modifier:
+			for index, value in zip( indices, values ):
+				modifier.setValue( plug.elementByLogicalIndex( int(index) ), codec, value )
+
+	def _getElementCodec( self, element ):
+		codec = self._node._getAttributeSchema( element ).codec( element )
+
+		if codec is None or codec.size is None:
+			raise TypeError( "Elements of '%s' are not numeric." % self )
+
+		return codec
 			
 	def __eq__( self, other ):
 		return str(self) == str(other)
@@ -528,38 +1403,48 @@ class NodeAttribute(object):
 	@property
 	def MPlug( self ):
 		"""Returns the instance of the maya api MPlug"""
-		if not self._plug:
-			self._plug = next( utils.iter_MPlugs( str(self) ) )
+		plug = self._getPlugOrNone()
 
-		return self._plug
+		if plug is None:
+			raise ValueError( "Plug '%s' doesn't exists." % self )
+
+		return plug
 
 	@property
 	def name( self ):
+		if self._attribute is None:
+			self._attribute = self._plug.partialName( False, False, True, False, True, True )
+
 		return self._attribute
 
 	@name.setter
 	def name( self, value ):
 		mc.renameAttr( str(self), value )
+		self._node._resetAttributes()
 
 	@property
 	def shortName( self ):
-		return mc.attributeQuery( self._attribute, node=str(self._node), shortName=True )
+		return self._getSchema().shortName
 	
 	@property
 	def index( self ):
+		if self._plug is not None and self._plug.isElement:
+			return self._plug.logicalIndex()
+
 		try:
-			n = self._attribute
+			n = self.name
 			return int(n[ n.rindex('[')+1:-1 ])
 		except:
 			raise TypeError( "Attribute is not inxeded." )
 
 	@property
 	def niceName( self ):
-		return mc.attributeName( str(self), nice=True )
+		return self._getSchema().niceName( self )
 	
 	@niceName.setter
 	def niceName( self, value ):
 		mc.addAttr( str(self), e=True, nn=value )
+		self._node._resetAttributes()
 	
 	@property
 	def alias( this ):
@@ -567,11 +1452,20 @@ class NodeAttribute(object):
 
 	@alias.setter
 	def alias( this, value ):
-		return mc.aliasAttr( value, str(this) )
+		mc.aliasAttr( value, str(this) )
+		this._node._resetAttributes()
+
+	@alias.deleter
+	def alias( this ):
+		alias = this.alias
+
+		if alias:
+			mc.aliasAttr( "%s.%s" % (this._node, alias), remove=True )
+			this._node._resetAttributes()
 
 	@property
 	def type( self ):
-		return mc.getAttr( str(self), type=True )
+		return self._getSchema().type( self )
 
 	@property
 	def length( self ):
@@ -585,10 +1479,21 @@ class NodeAttribute(object):
 		"""Calls cmds.getAttr with any extra argument and returns the value. Use time argument to get value at any time."""
 		return mc.getAttr( str(self), **kwargs )
 
+	def _getSchema( self ):
+		return self._node._getAttributeSchema( self.MPlug )
+
+	def _getCodec( self ):
+		return self._getSchema().codec( self.MPlug )
+
 	@property
 	def value( self ):
-		"""Gets the value of the attribute at current time.
-		For float3 or double3 returns the first element of the array [(0,0,0)]."""
+		"""Gets the value of the attribute at current time reading the MPlug.
+		For float3 or double3 returns a tuple. Types without codec are read with cmds.getAttr."""
+		codec = self._getCodec()
+
+		if codec is not None:
+			return codec.get( self.MPlug )
+
 		type  = self.type
 		value = self.get_value()
 
@@ -599,6 +1504,15 @@ class NodeAttribute(object):
 	
 	@value.setter
 	def value( self, value ):
+		"""Sets the value through a MDGModifier in a single undo step, or queues it in the current Modifier.
+		Types without codec are set with cmds.setAttr."""
+		codec = self._getCodec()
+
+		if codec is not None:
+			with Modifier.ensure() as modifier:
+				modifier.setValue( self.MPlug, codec, value )
+			return
+
 		type = self.type
 		
 		if type == "float3" or type == "double3":
@@ -620,17 +1534,14 @@ class NodeAttribute(object):
 
 	@property
 	def parent( self ):
-		plug   = self.MPlug
-		
-		try:
-			parent = plug.array() if plug.isElement else plug.parent()
-		except TypeError:
-			return None
-		
-		attr = NodeAttribute( self._node, parent.partialName( False, False, True, False, False, True ) )
-		attr._plug = parent
+		plug = self.MPlug
 
-		return attr
+		if plug.isElement:
+			return NodeAttribute( self._node, None, plug.array() )
+		elif plug.isChild:
+			return NodeAttribute( self._node, None, plug.parent() )
+		else:
+			return None
 	
 	@property
 	def locked( self ):
@@ -642,7 +1553,8 @@ class NodeAttribute(object):
 	
 	@property
 	def hidden( self ):
-		return not self.keyable and not mc.getAttr( str(self), channelBox=True )
+		plug = self.MPlug
+		return not plug.isKeyable and not plug.isChannelBox
 	
 	@hidden.setter
 	def hidden( self, value ):
@@ -650,7 +1562,7 @@ class NodeAttribute(object):
 	
 	@property
 	def keyable( self ):
-		return mc.getAttr( str(self), keyable=True )
+		return self.MPlug.isKeyable
 	
 	@keyable.setter
 	def keyable( self, value ):
@@ -658,15 +1570,11 @@ class NodeAttribute(object):
 
 	@property
 	def isProxy( self ):
-		mobject = self._node._MFnDependencyNode.attribute( self._attribute )
-		return om.MFnAttribute( mobject ).isProxyAttribute
+		return self._getSchema().isProxy
 
 	@property
 	def minValue( self ):
-		if mc.attributeQuery( self._attribute, node=str(self._node), minExists=True ):
-			return mc.attributeQuery( self._attribute, node=str(self._node), minimum=True )[0]
-		else:
-			return None
+		return self._getSchema().minValue
 	
 	@minValue.setter
 	def minValue( self, value ):
@@ -674,10 +1582,7 @@ class NodeAttribute(object):
 
 	@property
 	def maxValue( self ):
-		if mc.attributeQuery( self._attribute, node=str(self._node), maxExists=True ):
-			return mc.attributeQuery( self._attribute, node=str(self._node), maximum=True )[0]
-		else:
-			return None
+		return self._getSchema().maxValue
 
 	@maxValue.setter
 	def maxValue( self, value ):
@@ -685,21 +1590,28 @@ class NodeAttribute(object):
 
 	@property
 	def children( self ):
-		raise NotImplemented()
+		"""Returns the list of children of a compound attribute."""
+		plug = self.MPlug
+
+		if not plug.isCompound or plug.isArray:
+			raise TypeError( "Attribute '%s' is not a compound." % self )
+
+		return [NodeAttribute( self._node, None, plug.child(i) ) for i in range( plug.numChildren() )]
 
 	@property
 	def input( self ):
-		conn = mc.connectionInfo( str(self), sourceFromDestination=True )
-		
-		if conn:
-			return NodeAttribute( Node( conn[ :conn.index('.') ] ), conn[ conn.index('.') + 1: ] )
-		else:
+		"""Returns the source attribute connected to this one, None if it is not connected."""
+		source = self.MPlug.sourceWithConversion()
+
+		if source.isNull:
 			return None
 
+		return NodeAttribute( Node.fromMObject( source.node() ), None, source )
+
 	@input.setter
 	def input( self, value ):
 		if value:
-			mc.connectAttr( str(value), str(self) )
+			self.connect( value )
 		else:
 			self.disconnect()
 	
@@ -713,36 +1625,66 @@ class NodeAttribute(object):
 	
 	@property
 	def outputs( self ):
-		return NodeAttributeList( mc.connectionInfo( str(self), destinationFromSource=True ) )
+		"""Returns the list of the destination attributes connected to this one."""
+		return NodeAttributeList( [NodeAttribute( Node.fromMObject( p.node() ), None, p ) for p in self.MPlug.destinationsWithConversions()] )
 	
 	def ensure_input( self, source, **args ):
+		edit = GraphEdit.current()
+
+		if edit is not None:
+			edit.ensure( source, self )
+			return
+
 		input = self.input
 
 		if not input or str(input) != str(source):
 			self.connect( source, force=True )
 
 	def connect( self, source, **args ):
-		mc.connectAttr( str(source), str(self), **args )
+		"""Connects the source to this attribute. Inside a GraphEdit block the connection is recorded in it,
+		unless other flags than force are given."""
+		edit = NodeAttribute._getGraphEdit( args )
+
+		if edit is not None:
+			edit.connect( source, self, force=args.get( 'force', args.get( 'f', False ) ) )
+		else:
+			mc.connectAttr( str(source), str(self), **args )
 	
 	def connectTo( self, destination, **args ):
-		mc.connectAttr( str(self), str(destination), **args )
+		edit = NodeAttribute._getGraphEdit( args )
+
+		if edit is not None:
+			edit.connect( self, destination, force=args.get( 'force', args.get( 'f', False ) ) )
+		else:
+			mc.connectAttr( str(self), str(destination), **args )
 
 	def disconnect( self ):
+		edit = GraphEdit.current()
+
+		if edit is not None:
+			edit.disconnect( self )
+			return
+
 		destination = str(self)
 		source      = mc.connectionInfo( destination, sourceFromDestination=True )
 		
-		if destination:
+		if source:
 			mc.disconnectAttr( source, destination )
 
+	@staticmethod
+	def _getGraphEdit( args ):
+		"""Returns the current GraphEdit if the connectAttr flags can be recorded in it."""
+		return GraphEdit.current() if set( args ) <= set( ('force', 'f') ) else None
+
 	def isConnected( self ):
 		raise NotImplemented()
 		
 	def setKey( self, time=None ):
 	
 		if time != None:
-			mc.setKeyframe( str(self._node), at=self._attribute, time=time )
+			mc.setKeyframe( str(self._node), at=self.name, time=time )
 		else:	
-			mc.setKeyframe( str(self._node), at=self._attribute )
+			mc.setKeyframe( str(self._node), at=self.name )
 		
 	@property
 	def hasKeys( self ):
@@ -751,21 +1693,15 @@ class NodeAttribute(object):
 	
 	@property
 	def hasAnimatedConstantValue( self ):
-		attr = str(self)
-		tKey = mc.keyframe( attr, query=True )
-		
-		if not tKey or len(tKey) == 1:
-			return True
-		
-		r     = True
-		value = mc.keyframe( attr, time=(tKey[0],tKey[0]), q=True, eval=True )
-		
-		for t in KeyframeList._drange( tKey[1], tKey[-1], 1.0 ):
-			if value != mc.keyframe( attr, time=(t,t), q=True, eval=True ):
-				r = False
-				break
-				
-		return r
+		return KeyframeList( self ).hasConstantValue
+
+	def sample( self, times ):
+		"""Evaluates the attribute at every time under a MDGContext and returns a numpy array shaped (F,)
+		for scalar attributes and (F, k) otherwise. Requires numpy."""
+		from . import sampling
+
+		values = sampling.sampleAttributes( [self], times )
+		return values[ :, 0 ] if values.shape[1] == 1 else values
 
 	def delete( this, **kwargs ):
 		"""Removes the attribute or the element of an array. Use 'b' to force break connections."""
@@ -774,96 +1710,237 @@ class NodeAttribute(object):
 		else:
 			mc.deleteAttr( str(this) )
 
+		this._node._resetAttributes()
+
 	def findByAlias( this, alias ):
-		
-		for attr in this:
-			if attr.alias == alias:
-				return attr
+		"""Returns the element of the array that has the alias, None if there is no one."""
+		plug = this.MPlug
+
+		for name, attribute in this._node._MFnDependencyNode.getAliasList():
+			if name == alias:
+				element = this._node._findPlug( attribute )
+
+				if element is not None and element.isElement and element.array() == plug:
+					return NodeAttribute( this._node, attribute, element )
 
 		return None
 
 class NodeConnectionList(object):
+	"""Connections of the plugs of a node as (source, destination) pairs of NodeAttributes, listed from the MPlugs.
+	source lists the connections coming into the node and destination the ones going out of it. Conversion nodes
+	are not skipped, like listConnections. type filters by the node at the other side, a type name (derived types
+	included) or a MFn type."""
+
+	__slots__ = ( '_node', '_source', '_destination', '_type' )
 	
-	def __init__( self, node, source=True, destination=True, **args ):
-		self._node = node
-		self._args = args
-		self._args.update( source=source, destination=destination )
-		
-		self._mode = 0 if source and destination else 1 if source else 2
+	def __init__( self, node, source=True, destination=True, type=None ):
+		self._node        = node
+		self._source      = source
+		self._destination = destination
+		self._type        = type
 
 	def __getitem__( self, value ):
 
 		if isinstance( value, int ):
-			s, d = list(self._iterPlugs())[value]
-			NodeAttribute.fromName( s ), NodeAttribute.fromName( d )
+			return list( self )[ value ]
 		else:
-			return NodeConnectionList( self._node, type=value )
+			return self.ofType( value )
 	
 	def __iter__( self ):
-		for s, d in self._iterPlugs():
-			yield NodeAttribute.fromName( s ), NodeAttribute.fromName( d )
+		node = self._node
+
+		for plug, other, isSource in self._iterMPlugs():
+			attribute = NodeAttribute( node, None, plug )
+			connected = NodeAttribute( Node.fromMObject( other.node() ), None, other )
+
+			yield (connected, attribute) if isSource else (attribute, connected)
 
 	def __len__( self ):
-		return bool(self._listConnections())
+		return sum( 1 for item in self._iterMPlugs() )
 	
 	def __bool__( self ):
-		return bool(self._listConnections())
+		return next( self._iterMPlugs(), None ) is not None
 
 	def __nonzero__( self ):
 		return self.__bool__()
+
+	def ofType( self, type ):
+		"""Returns the connections with nodes of the type, a type name (derived types included) or a MFn type."""
+		return NodeConnectionList( self._node, self._source, self._destination, type )
 	
-	def _iterPlugs( self ):
-		conns = self._listConnections() or []
-		
-		if self._mode == 1:
-			z = zip( conns[1::2], conns[0::2] )
-		elif self._mode == 2:
-			z = zip( conns[0::2], conns[1::2] )
-		else:
-			raise NotImplementedError( "Can't list sources and destinations in the same list." )
+	def _iterMPlugs( self ):
+		"""Yields the plug of the node, the plug at the other side and True if the other plug is the source."""
+		mObject = self._node._MObject
+		accept  = _getTypeFilter( self._type )
+
+		for plug in self._node._MFnDependencyNode.getConnections():
+			if self._source and plug.isDestination:
+				other = plug.sourceWithConversion()
+
+				if not other.isNull and accept( other.node() ):
+					yield plug, other, True
 
-		return z
+			if self._destination and plug.isSource:
+				for other in plug.destinationsWithConversions():
+					# Connections between plugs of the node are listed once, as inputs
+					if self._source and other.node() == mObject:
+						continue
+
+					if accept( other.node() ):
+						yield plug, other, False
 
-	def _listConnections( self ):
-		return mc.listConnections( str(self._node), plugs=True, connections=True, **self._args )
 	
 	@property
 	def nodes( self ):
-		if self._args:
-			conns = mc.listConnections( str(self._node), **self._args )
-		else:
-			conns = mc.listConnections( str(self._node) )
-		
-		out = []
+		"""Yields the nodes at the other side of the connections, without duplicates."""
+		found = _IdentityMap()
 
-		if conns:
-			for conn in conns:
-				if not conn in out:
-					out.append( conn )
-					yield Node( conn )
+		for plug, other, isSource in self._iterMPlugs():
+			mObject = other.node()
+
+			if found.add( mObject, None ):
+				yield Node.fromMObject( mObject )
 
 class NodeList(object):
+	"""List of nodes backed by an MSelectionList. Nodes are wrapped only when they are accessed by index or iteration.
+	Like the MSelectionList the list has no duplicates. Supports the |, & and - operators and the in keyword,
+	comparing the nodes by identity instead of by name."""
+
+	__slots__ = ( '_MSelectionList', '_indices' )
 	
-	def __init__( self, innerList ):
-		self._innerList = [Node.fromMObject(o, d) for o, d in utils.iter_MObjectAndMDagPath( *innerList )] if innerList else []
+	def __init__( self, innerList, skipMissing=False, missing=None ):
+		"""Resolves all the names in a single MSelectionList. Use skipMissing or a missing list to not raise on missing nodes."""
+		self._MSelectionList = utils.get_MSelectionList( innerList or [], skipMissing=skipMissing, missing=missing )
+		self._indices        = range( self._MSelectionList.length() )
+
+	@staticmethod
+	def fromMSelectionList( sel, indices=None ):
+		"""Returns a NodeList that uses the selection list without copying it. Indices is a range of the list items.
+		Items with components or plugs are used as their nodes, use utils.get_nodesOnly to merge them first."""
+		instance = object.__new__( NodeList )
+		instance._MSelectionList = sel
+		instance._indices        = indices if indices is not None else range( sel.length() )
+
+		return instance
 		
 	def __str__( self ):
-		return str( self._innerList )
+		return "[%s]" % ", ".join( self.nodeNames )
 	
 	def __repr__( self ):
 		return str(self)
 		
 	def __iter__( self ):
-		return self._innerList.__iter__()
+		for mObject, mDagPath in utils.iter_MSelectionList( self._MSelectionList, self._indices ):
+			yield Node.fromMObject( mObject, mDagPath )
 
 	def __len__( self ):
-		return len(self._innerList)
+		return len(self._indices)
 	
 	def __getitem__( self, index ):
-		return self._innerList[index]
+		if isinstance( index, slice ):
+			return NodeList.fromMSelectionList( self._MSelectionList, self._indices[index] )
+
+		return self._getNode( self._indices[index] )
 	
+	def __bool__( self ):
+		return len(self._indices) > 0
+
 	def __nonzero__( self ):
-		return bool(self._innerList)
+		return self.__bool__()
+
+	def _isWholeList( self ):
+		return self._indices == range( self._MSelectionList.length() )
+
+	def _getNode( self, i ):
+		mObject, mDagPath = next( utils.iter_MSelectionList( self._MSelectionList, (i,) ) )
+		return Node.fromMObject( mObject, mDagPath )
+
+	def __contains__( self, node ):
+		item = NodeList._getItem( node )
+		return item is not None and self.MSelectionList.hasItem( item )
+
+	def __or__( self, other ):
+		"""Returns the nodes of both lists without duplicates."""
+		found = NodeList._getIdentityMap( self )
+		sel   = om.MSelectionList( self.MSelectionList )
+
+		for mObject, mDagPath in NodeList._iterItems( other ):
+			if found.add( mObject, mDagPath ):
+				sel.add( mDagPath if mDagPath is not None else mObject, False )
+
+		return NodeList.fromMSelectionList( sel )
+
+	def __and__( self, other ):
+		"""Returns the nodes of this list that are in the other list."""
+		found = NodeList._getIdentityMap( other )
+		return self._filter( lambda mObject, mDagPath: found.get( mObject, mDagPath, False ) )
+
+	def __sub__( self, other ):
+		"""Returns the nodes of this list that are not in the other list."""
+		found = NodeList._getIdentityMap( other )
+		return self._filter( lambda mObject, mDagPath: not found.get( mObject, mDagPath, False ) )
+
+	def _filter( self, predicate ):
+		sel = om.MSelectionList()
+
+		for mObject, mDagPath in NodeList._iterItems( self ):
+			if predicate( mObject, mDagPath ):
+				sel.add( mDagPath if mDagPath is not None else mObject, False )
+
+		return NodeList.fromMSelectionList( sel )
+
+	@staticmethod
+	def _getIdentityMap( nodes ):
+		found = _IdentityMap()
+
+		for mObject, mDagPath in NodeList._iterItems( nodes ):
+			found.add( mObject, mDagPath )
+
+		return found
+
+	@staticmethod
+	def _iterItems( nodes ):
+		"""Yields the MObject and the MDagPath (None for dependency nodes) of every node.
+		Nodes can be a NodeList or any iterable of nodes or names."""
+
+		if isinstance( nodes, NodeList ):
+			return utils.iter_MSelectionList( nodes._MSelectionList, nodes._indices )
+		elif isinstance( nodes, Node ):
+			return iter( [NodeList._getMObjectAndMDagPath( nodes )] )
+		else:
+			return ( NodeList._getMObjectAndMDagPath( n ) for n in nodes )
+
+	@staticmethod
+	def _getMObjectAndMDagPath( node ):
+
+		if isinstance( node, DagNode ):
+			return node._MObject, node._MDagPath
+		elif isinstance( node, Node ):
+			return node._MObject, None
+		else:
+			return next( utils.iter_MObjectAndMDagPath( str(node) ) )
+
+	@staticmethod
+	def _getItem( node ):
+		"""Returns the MDagPath or the MObject of a node or a name. None if the name doesn't exist."""
+		try:
+			mObject, mDagPath = NodeList._getMObjectAndMDagPath( node )
+		except ValueError:
+			return None
+
+		return mDagPath if mDagPath is not None else mObject
+
+	@property
+	def MSelectionList( self ):
+		"""Returns the maya api MSelectionList with the nodes of the list."""
+		if self._isWholeList():
+			return self._MSelectionList
+
+		sel = om.MSelectionList()
+		for mObject, mDagPath in utils.iter_MSelectionList( self._MSelectionList, self._indices ):
+			sel.add( mDagPath if mDagPath is not None else mObject )
+
+		return sel
 
 	def getInputs( self, type=None ):
 		return self.getConnections( inputs=True, outputs=False, type=type )
@@ -883,68 +1960,400 @@ class NodeList(object):
 		else:
 			return NodeList( [] )
 	
+	def traverse( self, direction="upstream", **kwargs ):
+		"""Yields the nodes connected upstream or downstream of any node of the list. Nodes reached from
+		more than one node of the list are returned once. See Node.traverse for the arguments."""
+		roots = ( mObject for mObject, mDagPath in utils.iter_MSelectionList( self._MSelectionList, self._indices ) )
+		return _traverseGraph( roots, direction, **kwargs )
+
+	def upstream( self, **kwargs ):
+		return self.traverse( "upstream", **kwargs )
+
+	def downstream( self, **kwargs ):
+		return self.traverse( "downstream", **kwargs )
+
 	def delete( this ):
 		mc.delete( this.nodeNames )
 
 	@property
 	def first( self ):
-		return next( self._innerList.__iter__(), None )
+		return self._getNode( self._indices[0] ) if self._indices else None
 
 	@property
 	def nodeNames( self ):
-		return [str(n) for n in self._innerList]
+		"""Returns the names of the nodes without wrapping them, one per node."""
+		sel = self._MSelectionList
+
+		if self._isWholeList():
+			names = sel.getSelectionStrings()
+
+			# Components and plugs have their own strings, sometimes more than one per item
+			if len(names) == len(self._indices) and not any( '.' in name for name in names ):
+				return list( names )
+
+		fn    = om.MFnDependencyNode()
+		names = []
+
+		for mObject, mDagPath in utils.iter_MSelectionList( sel, self._indices ):
+			if mDagPath is not None:
+				names.append( mDagPath.partialPathName() )
+			else:
+				fn.setObject( mObject )
+				names.append( fn.name() )
+
+		return names
 
 	@property
 	def animation( self ):
 		return Animation( self.nodeNames )
+
+	def _iterPlugs( self, attributes ):
+		"""Yields the type name and the list of plugs of the attributes (None for missing ones) of every node."""
+		fn = om.MFnDependencyNode()
+
+		for mObject, mDagPath in utils.iter_MSelectionList( self._MSelectionList, self._indices ):
+			fn.setObject( mObject )
+			yield fn.typeName, [_findNodePlug( fn, mDagPath, a ) for a in attributes]
+
+	def _iterPlugsWithCodecs( self, attributes ):
+		"""Like _iterPlugs but yields (plug, codec) pairs. Codecs of static attributes are looked up once per node type."""
+		codecs = {}
+
+		for typeName, row in self._iterPlugs( attributes ):
+			items = []
+
+			for j, plug in enumerate( row ):
+				if plug is None:
+					items.append( (None, None) )
+					continue
+
+				key   = ( typeName, j )
+				codec = codecs.get( key )
+
+				if codec is None:
+					codec = plugs.getCodec( plug, typeName )
+
+					if not plug.isDynamic:
+						codecs[ key ] = codec
+
+				items.append( (plug, codec) )
+
+			yield items
+
+	def getAttr( self, attributes, mask=False ):
+		"""Reads numeric attributes of all the nodes in a single pass over their plugs and returns a numpy array.
+
+		The array is shaped (N,) for a single scalar attribute and (N, k) otherwise, where k is the total number
+		of values of the attributes, e.g. 4 for ["translate", "visibility"]. Nodes without an attribute get NaN.
+		With mask=True also returns a boolean array, shaped (N,) or (N, len(attributes)), that is True where the
+		node has the attribute."""
+		import numpy as np
+
+		names       = [attributes] if isinstance( attributes, str ) else list( attributes )
+		rows, sizes = self._getNumericPlugs( names )
+		offsets     = [sum( sizes[:j] ) for j in range( len(sizes) )]
+		values  = np.full( ( len(rows), sum(sizes) ), np.nan )
+		exists  = np.zeros( ( len(rows), len(names) ), dtype=bool )
+
+		for i, items in enumerate( rows ):
+			for j, (plug, codec) in enumerate( items ):
+				if plug is not None:
+					if sizes[j] == 1:
+						values[ i, offsets[j] ] = codec.get( plug )
+					else:
+						values[ i, offsets[j]:offsets[j] + sizes[j] ] = codec.get( plug )
+
+					exists[ i, j ] = True
+
+		if len(names) == 1:
+			exists = exists[ :, 0 ]
+
+			if sizes[0] == 1:
+				values = values[ :, 0 ]
+
+		return (values, exists) if mask else values
+
+	def _getNumericPlugs( self, names ):
+		"""Returns the (plug, codec) pairs of the attributes of every node and the number of values of every attribute.
+		Raises a TypeError if some attribute is not numeric or has a different number of values on some nodes."""
+		rows  = list( self._iterPlugsWithCodecs( names ) )
+		sizes = [None] * len(names)
+
+		for items in rows:
+			for j, (plug, codec) in enumerate( items ):
+				if plug is None:
+					continue
+
+				if codec is None or codec.size is None:
+					raise TypeError( "Attribute '%s' is not numeric." % plug.name() )
+
+				if sizes[j] is None:
+					sizes[j] = codec.size
+				elif sizes[j] != codec.size:
+					raise TypeError( "Attribute '%s' has a different number of values on some nodes." % names[j] )
+
+		return rows, [size or 1 for size in sizes]
+
+	def sample( self, attributes, times ):
+		"""Evaluates numeric attributes of all the nodes at every time, under a MDGContext and without changing
+		the current time, and returns a numpy array shaped (F, N) for a single scalar attribute and (F, N, k)
+		otherwise, like getAttr with one more axis for the times. Nodes without an attribute get NaN.
+		Use sampling.frameRange to get the times of a range of frames."""
+		from . import sampling
+
+		names       = [attributes] if isinstance( attributes, str ) else list( attributes )
+		rows, sizes = self._getNumericPlugs( names )
+		values      = sampling.sampleRows( rows, sizes, times )
+
+		if len(names) == 1 and sizes[0] == 1:
+			values = values[ :, :, 0 ]
+
+		return values
+
+	def sampleWorldMatrices( self, times ):
+		"""Evaluates the world matrix of all the nodes at every time and returns a numpy array shaped (F, N, 4, 4).
+		Instances get the matrix of their own path and not DAG nodes get NaN."""
+		values = self.sample( "worldMatrix", times )
+		return values.reshape( values.shape[:2] + (4, 4) )
+
+	def _getDagPaths( self ):
+		"""Returns the MDagPath of every node, None for the nodes that are not DAG nodes."""
+		return [mDagPath for mObject, mDagPath in utils.iter_MSelectionList( self._MSelectionList, self._indices )]
+
+	def getMatrices( self, space="world" ):
+		"""Returns a numpy array shaped (N, 4, 4) with the world or local matrices of the nodes, read from their
+		MDagPaths in internal units. Like MMatrix the translation is in the last row. Not DAG nodes get NaN."""
+		import numpy as np
+
+		values = np.full( ( len(self), 16 ), np.nan )
+
+		for i, path in enumerate( self._getDagPaths() ):
+			if path is not None:
+				values[i] = _getMatrixElements( _getDagMatrix( path, space ) )
+
+		return values.reshape( -1, 4, 4 )
+
+	def getTransforms( self, space="local" ):
+		"""Returns the translation, rotation and scale of the nodes as three numpy arrays shaped (N, 3), in the same
+		units than getAttr. Local rotations are in the rotate order of the nodes, like the rotate attribute,
+		and world rotations are decomposed in xyz order. Not DAG nodes get NaN."""
+		import numpy as np
+
+		translate = np.full( ( len(self), 3 ), np.nan )
+		rotate    = np.full( ( len(self), 3 ), np.nan )
+		scale     = np.full( ( len(self), 3 ), np.nan )
+
+		for i, path in enumerate( self._getDagPaths() ):
+			if path is None:
+				continue
+
+			if space == "local" and path.node().hasFn( om.MFn.kTransform ):
+				transformation = om.MFnTransform( path ).transformation()
+			else:
+				transformation = om.MTransformationMatrix( _getDagMatrix( path, space ) )
+
+			t = transformation.translation( om.MSpace.kTransform )
+			r = transformation.rotation()
+
+			translate[i] = t.x, t.y, t.z
+			rotate[i]    = r.x, r.y, r.z
+			scale[i]     = transformation.scale( om.MSpace.kTransform )
+
+		translate *= om.MDistance( 1.0 ).asUnits( om.MDistance.uiUnit() )
+		rotate    *= om.MAngle( 1.0 ).asUnits( om.MAngle.uiUnit() )
+
+		return translate, rotate, scale
+
+	def setMatrices( self, matrices, space="world" ):
+		"""Sets the world or local matrices of the transforms, a single matrix or one per node in a numpy array
+		shaped (N, 4, 4) like getMatrices returns. Parents are set before their children so world matrices are
+		kept, and all the nodes are set in one undo step. Matrices are decomposed keeping the pivots, the rotate axis
+		and the joint orient, so getMatrices returns them back. Joints with pivots raise a ValueError."""
+		import numpy as np
+
+		if not space in ( "world", "local" ):
+			raise ValueError( "Invalid space '%s', use 'world' or 'local'." % space )
+
+		values = np.asarray( matrices, dtype=np.float64 ).reshape( -1, 16 )
+		paths  = self._getDagPaths()
+
+		if len(values) == 1:
+			values = np.repeat( values, len(paths), axis=0 )
+		elif len(values) != len(paths):
+			raise ValueError( "Expected %d matrices, got %d." % (len(paths), len(values)) )
+
+		names = self.nodeNames
+
+		for name, path in zip( names, paths ):
+			if path is None or not path.node().hasFn( om.MFn.kTransform ):
+				raise TypeError( "Node '%s' is not a transform." % name )
+
+			if path.node().hasFn( om.MFn.kJoint ) and _hasPivots( om.MFnTransform( path ) ):
+				raise ValueError( "Joint '%s' has pivots, its matrix can't be set." % name )
+
+		order = sorted( range( len(paths) ), key=lambda i: paths[i].length() )
+		items = [( paths[i], om.MMatrix( values[i].tolist() ) ) for i in order]
+		old   = [om.MFnTransform( path ).transformation() for path, matrix in items]
+
+		def doIt():
+			fn = om.MFnTransform()
+
+			for path, matrix in items:
+				fn.setObject( path )
+				_setLocalMatrix( fn, matrix * path.exclusiveMatrixInverse() if space == "world" else matrix )
+
+		def undoIt():
+			fn = om.MFnTransform()
+
+			for (path, matrix), transformation in reversed( list( zip( items, old ) ) ):
+				fn.setObject( path )
+				fn.setTransformation( transformation )
+
+		commit( doIt, undoIt )
+
+	def setTransforms( self, translate=None, rotate=None, scale=None, space="local" ):
+		"""Sets the translation, rotation and scale of the transforms in one undo step, each one a single value or
+		one per node, in the units and rotate orders of getTransforms. None keeps the current values.
+		Local values are set like the attributes, world values are composed and set with setMatrices."""
+		import numpy as np
+
+		if space == "local":
+			with Modifier.ensure():
+				for attribute, value in ( ("translate", translate), ("rotate", rotate), ("scale", scale) ):
+					if value is not None:
+						self.setAttr( attribute, value )
+			return
+
+		current = self.getTransforms( space )
+		values  = [current[i] if v is None else np.broadcast_to( np.asarray( v, dtype=np.float64 ), current[i].shape )
+			for i, v in enumerate( (translate, rotate, scale) )]
+
+		distance = om.MDistance( 1.0, om.MDistance.uiUnit() ).asUnits( om.MDistance.internalUnit() )
+		angle    = om.MAngle( 1.0, om.MAngle.uiUnit() ).asUnits( om.MAngle.internalUnit() )
+		matrices = []
+
+		for t, r, s in zip( values[0] * distance, values[1] * angle, values[2] ):
+			transformation = om.MTransformationMatrix()
+			transformation.setTranslation( om.MVector( *t ), om.MSpace.kTransform )
+			transformation.setRotation( om.MEulerRotation( *r ) )
+			transformation.setScale( s.tolist(), om.MSpace.kTransform )
+
+			matrices.append( _getMatrixElements( transformation.asMatrix() ) )
+
+		self.setMatrices( matrices, space )
 		
+	def _iterKeyablePlugs( self ):
+		"""Yields the type name and the list of keyable plugs of every node."""
+		fn = om.MFnDependencyNode()
+
+		for mObject, mDagPath in utils.iter_MSelectionList( self._MSelectionList, self._indices ):
+			fn.setObject( mObject )
+			yield fn.typeName, list( _iterKeyableNodePlugs( fn ) )
+
+	def snapshot( self, attributes=None ):
+		"""Captures the values of the attributes of all the nodes in a Pose, that can be applied later in one undo step.
+		By default captures the keyable attributes, like listAttr with keyable=True. Requires numpy."""
+		from .pose import Pose
+		return Pose.capture( self, attributes )
+
 	def setAttr( self, attrName, value ):
-		
-		for n in self:
-			n[ attrName ] = value
+		"""Sets the attribute of all the nodes with a single MDGModifier and one undo step.
+		value is a single value for all the nodes, or a sequence or numpy array with one value per node.
+		Inside a Modifier block the values are queued in it."""
+
+		items   = [row[0] for row in self._iterPlugsWithCodecs( [attrName] )]
+		missing = [i for i, (plug, codec) in enumerate( items ) if plug is None]
+
+		if missing:
+			names = self.nodeNames
+			raise KeyError( "Nodes %s have not attribute '%s'." % ([names[i] for i in missing], attrName) )
+
+		for plug, codec in items:
+			if codec is None:
+				raise TypeError( "Attribute '%s' can't be set in bulk." % plug.name() )
+
+		size   = items[0][1].size if items else None
+		values = _getValuePerNode( value, len(items), size )
+
+		with Modifier.ensure() as modifier:
+			for (plug, codec), v in zip( items, values ):
+				modifier.setValue( plug, codec, v )
 
 class NodeAttributeList(object):
+
+	__slots__ = ( '_list', )
 	
 	def __init__( self, nameList ):
-		self._list = nameList
+		"""nameList has attribute names or NodeAttributes."""
+		self._list = nameList or []
 
 	def __iter__( self ):
 		for n in self._list:
-			yield NodeAttribute.fromName( n )
+			yield NodeAttributeList._get( n )
 
 	def __len__( self ):
 		return len(self._list)
 
+	def __bool__( self ):
+		return bool( self._list )
+
 	def __nonzero__( self ):
 		return bool( self._list )
 			
 	def __getitem__( self, index ):
-		return NodeAttribute.fromName( self._list[index] )
+		return NodeAttributeList._get( self._list[index] )
+
+	@staticmethod
+	def _get( item ):
+		return item if isinstance( item, NodeAttribute ) else NodeAttribute.fromName( item )
 
 class NodeAttributeCollection(object):
 
+	__slots__ = ( '_node', )
+
 	def __init__( self, node ):
 		self._node = node
 
 	def __getitem__( self, attribute ):
+		plug = self._node._findPlug( attribute )
 
-		if not self.contains( attribute ):
+		if plug is None:
 			raise KeyError( "Node '%s' has not attribute '%s'." % (self._node, attribute) )
 
-		return NodeAttribute( self._node, attribute )
+		return NodeAttribute( self._node, attribute, plug )
 
 	def __getattr__( self, attribute ):
+		if attribute[0] == '_':
+			raise AttributeError( attribute )
 
 		return self[ attribute ]
 		
 	def __iter__( self ):
+		fn = self._node._MFnDependencyNode
+
+		for i in range( fn.attributeCount() ):
+			mObject = fn.attribute( i )
+
+			# Like listAttr, children of array compounds are skipped
+			if not NodeAttributeCollection._isInArray( mObject ):
+				yield NodeAttribute( self._node, om.MFnAttribute( mObject ).name, fn.findPlug( mObject, False ) )
 
-		for n in mc.listAttr( str(self._node) ):
-			if not '.' in n:
-				yield NodeAttribute( self._node, n )
+	@staticmethod
+	def _isInArray( mObject ):
+		parent = om.MFnAttribute( mObject ).parent
+
+		while not parent.isNull():
+			fn = om.MFnAttribute( parent )
+
+			if fn.array:
+				return True
+
+			parent = fn.parent
+
+		return False
 
 	def __contains__( self, attribute ):
-		return mc.attributeQuery( attribute, node=str(self._node), ex=True )
+		return self._node._findPlug( attribute ) is not None
 
 	def contains( self, attribute ):
 		return attribute in self
@@ -955,6 +2364,8 @@ class NodeAttributeCollection(object):
 			mc.deleteAttr( str(self._node), at=attribute )
 		except:
 			raise KeyError( "Node '%s' has not attribute '%s'." % (self._node, attribute) )
+
+		self._node._resetAttributes()
 	
 	def add( self, name, type=None, keyable=True, hidden=False, **args ):
 		
@@ -962,6 +2373,8 @@ class NodeAttributeCollection(object):
 			args["at"] = type
 		
 		mc.addAttr( str(self._node), ln=name, **args )
+		self._node._resetAttributes()
+
 		attr = NodeAttribute( self._node, name )
 		# I found this values are not set using addAttr
 		attr.keyable = keyable
@@ -976,6 +2389,7 @@ class NodeAttributeCollection(object):
 		mc.addAttr( n, shortName=name +'X', attributeType='doubleAngle', parent=name, keyable=True )
 		mc.addAttr( n, shortName=name +'Y', attributeType='doubleAngle', parent=name, keyable=True )
 		mc.addAttr( n, shortName=name +'Z', attributeType='doubleAngle', parent=name, keyable=True )
+		self._node._resetAttributes()
 		
 		return NodeAttribute( self._node, name )
 
@@ -3,16 +3,16 @@ from ..node import Node
 
 class ObjectSetNode(Node):
 
-    def __init__( self, *args, **kwargs ):
-        super( ObjectSetNode, self ).__init__( *args, **kwargs )
-        self._members = ObjectSetMemberCollection( self )
+    __slots__ = ()
 
     @property
     def members( self ):
-        return self._members
+        return ObjectSetMemberCollection( self )
 
 class ObjectSetMemberCollection(object):
 
+    __slots__ = ( '_setNode', )
+
     def __init__( self, node ):
         self._setNode = node
 
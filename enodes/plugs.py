@@ -0,0 +1,211 @@
+"""
+Codecs that read and write attribute values through the MPlug instead of getAttr and setAttr.
+"""
+
+import maya.api.OpenMaya as om
+
+class PlugCodec(object):
+	"""Reads the value of a plug and queues new values in a MDGModifier.
+	Values are in the same units and format than cmds.getAttr returns.
+	size is the number of floats of a numeric value and None for not numeric values."""
+
+	__slots__ = ()
+
+	size = None
+
+	def get( self, plug ):
+		raise NotImplementedError()
+
+	def queue( self, modifier, plug, value ):
+		raise NotImplementedError()
+
+class NumericCodec(PlugCodec):
+
+	__slots__ = ( '_get', '_queue', '_type' )
+
+	size = 1
+
+	def __init__( self, get, queue, type ):
+		self._get   = get
+		self._queue = queue
+		self._type  = type
+
+	def get( self, plug ):
+		return self._get( plug )
+
+	def queue( self, modifier, plug, value ):
+		self._queue( modifier, plug, self._type( value ) )
+
+class UnitCodec(PlugCodec):
+	"""Converts angles, distances and times between internal and ui units."""
+
+	__slots__ = ( '_unitClass', '_get', '_queue' )
+
+	size = 1
+
+	def __init__( self, unitClass, get, queue ):
+		self._unitClass = unitClass
+		self._get       = get
+		self._queue     = queue
+
+	def get( self, plug ):
+		return self._get( plug ).asUnits( self._unitClass.uiUnit() )
+
+	def queue( self, modifier, plug, value ):
+		self._queue( modifier, plug, self._unitClass( value, self._unitClass.uiUnit() ) )
+
+class EnumCodec(PlugCodec):
+	"""Values are the field indices. Field names are also accepted when setting."""
+
+	__slots__ = ( '_attribute', )
+
+	size = 1
+
+	def __init__( self, attribute ):
+		self._attribute = attribute
+
+	def get( self, plug ):
+		return plug.asShort()
+
+	def queue( self, modifier, plug, value ):
+		if isinstance( value, str ):
+			value = om.MFnEnumAttribute( self._attribute ).fieldValue( value )
+
+		modifier.newPlugValueShort( plug, int(value) )
+
+class CompoundCodec(PlugCodec):
+	"""Numeric compounds like double3 or float2. Values are tuples."""
+
+	__slots__ = ( '_children', 'size' )
+
+	def __init__( self, children ):
+		self._children = children
+		self.size      = len(children) if all( c.size == 1 for c in children ) else None
+
+	def get( self, plug ):
+		return tuple( codec.get( plug.child(i) ) for i, codec in enumerate( self._children ) )
+
+	def queue( self, modifier, plug, value ):
+		if len(value) != len(self._children):
+			raise ValueError( "Expected %d values for '%s'." % ( len(self._children), plug.name() ) )
+
+		for i, codec in enumerate( self._children ):
+			codec.queue( modifier, plug.child(i), value[i] )
+
+class MatrixCodec(PlugCodec):
+	"""Values are lists of 16 floats. Also sets 4x4 sequences, like numpy arrays shaped (4, 4)."""
+
+	__slots__ = ()
+
+	size = 16
+
+	def get( self, plug ):
+		matrix = om.MFnMatrixData( plug.asMObject() ).matrix()
+		return [matrix.getElement( r, c ) for r in range(4) for c in range(4)]
+
+	def queue( self, modifier, plug, value ):
+		if len(value) == 4:
+			value = [v for row in value for v in row]
+
+		modifier.newPlugValue( plug, om.MFnMatrixData().create( om.MMatrix( [float( v ) for v in value] ) ) )
+
+class StringCodec(PlugCodec):
+
+	__slots__ = ()
+
+	def get( self, plug ):
+		return plug.asString()
+
+	def queue( self, modifier, plug, value ):
+		modifier.newPlugValueString( plug, value )
+
+class MessageCodec(PlugCodec):
+	"""Message attributes have no value."""
+
+	__slots__ = ()
+
+	def get( self, plug ):
+		return None
+
+	def queue( self, modifier, plug, value ):
+		raise TypeError( "Message attribute '%s' has no value." % plug.name() )
+
+_bool   = NumericCodec( om.MPlug.asBool,   om.MDGModifier.newPlugValueBool,   bool )
+_int    = NumericCodec( om.MPlug.asInt,    om.MDGModifier.newPlugValueInt,    int )
+_float  = NumericCodec( om.MPlug.asFloat,  om.MDGModifier.newPlugValueFloat,  float )
+_double = NumericCodec( om.MPlug.asDouble, om.MDGModifier.newPlugValueDouble, float )
+
+_numericCodecs = {
+	om.MFnNumericData.kBoolean : _bool,
+	om.MFnNumericData.kByte    : _int,
+	om.MFnNumericData.kChar    : _int,
+	om.MFnNumericData.kShort   : _int,
+	om.MFnNumericData.kInt     : _int,
+	om.MFnNumericData.kFloat   : _float,
+	om.MFnNumericData.kDouble  : _double,
+}
+
+_unitCodecs = {
+	om.MFnUnitAttribute.kAngle    : UnitCodec( om.MAngle,    om.MPlug.asMAngle,    om.MDGModifier.newPlugValueMAngle ),
+	om.MFnUnitAttribute.kDistance : UnitCodec( om.MDistance, om.MPlug.asMDistance, om.MDGModifier.newPlugValueMDistance ),
+	om.MFnUnitAttribute.kTime     : UnitCodec( om.MTime,     om.MPlug.asMTime,     om.MDGModifier.newPlugValueMTime ),
+}
+
+_matrix  = MatrixCodec()
+_string  = StringCodec()
+_message = MessageCodec()
+
+_codecs = {}
+
+def createCodec( plug ):
+	"""Returns a new codec for the value of the plug, or None when the value can only be read with cmds."""
+
+	if plug.isArray:
+		return None
+
+	attribute = plug.attribute()
+
+	if attribute.hasFn( om.MFn.kEnumAttribute ):
+		return EnumCodec( attribute )
+
+	elif attribute.hasFn( om.MFn.kUnitAttribute ):
+		return _unitCodecs.get( om.MFnUnitAttribute( attribute ).unitType() )
+
+	elif attribute.hasFn( om.MFn.kNumericAttribute ):
+		codec = _numericCodecs.get( om.MFnNumericAttribute( attribute ).numericType() )
+
+		if codec is None and plug.isCompound:
+			children = [createCodec( plug.child(i) ) for i in range( plug.numChildren() )]
+			codec    = CompoundCodec( children ) if all( children ) else None
+
+		return codec
+
+	elif attribute.hasFn( om.MFn.kMatrixAttribute ):
+		return _matrix
+
+	elif attribute.hasFn( om.MFn.kTypedAttribute ):
+		type = om.MFnTypedAttribute( attribute ).attrType()
+
+		if type == om.MFnData.kString:
+			return _string
+		elif type == om.MFnData.kMatrix:
+			return _matrix
+
+	elif attribute.hasFn( om.MFn.kMessageAttribute ):
+		return _message
+
+	return None
+
+def getCodec( plug, typeName ):
+	"""Returns the codec for the plug. Codecs of static attributes are created once per node type."""
+
+	if plug.isDynamic:
+		return createCodec( plug )
+
+	key = ( typeName, om.MFnAttribute( plug.attribute() ).name, plug.isArray )
+
+	try:
+		return _codecs[ key ]
+	except KeyError:
+		codec = _codecs[ key ] = createCodec( plug )
+		return codec
@@ -0,0 +1,249 @@
+"""
+Poses: the values of many plugs captured at once, packed in a numpy buffer to restore, compare or blend them.
+Poses are captured and applied in maya, but can be compared and blended without it.
+"""
+
+import numpy as np
+
+_plugNameArgs = ( False, False, True, False, True, True )
+
+class Pose(object):
+	"""Values of plugs captured with NodeList.snapshot. Numeric values are packed in a float64 buffer, in the
+	same units than cmds.getAttr returns, and other values like strings are stored apart.
+	Poses can be pickled: the plugs are stored by name and resolved again the first time the pose is applied."""
+
+	__slots__ = ( '_names', '_sizes', '_values', '_others', '_plugs', '_otherPlugs' )
+
+	def __init__( self, names, sizes, values, others=None ):
+		"""names are the "node.attribute" names of the numeric plugs, sizes the number of values of every plug
+		and values the flat buffer with all of them. others is a dict with the not numeric values by plug name."""
+		self._names      = list( names )
+		self._sizes      = np.asarray( sizes, dtype=np.int32 )
+		self._values     = np.asarray( values, dtype=np.float64 )
+		self._others     = dict( others or {} )
+		self._plugs      = None
+		self._otherPlugs = None
+
+		if self._sizes.sum() != len(self._values):
+			raise ValueError( "Expected %d values, got %d." % (self._sizes.sum(), len(self._values)) )
+
+	@staticmethod
+	def capture( nodes, attributes=None ):
+		"""Returns the pose of the attributes of the nodes of the NodeList, by default the keyable ones.
+		Missing attributes, message attributes and values that can't be read through the plug are skipped."""
+		from . import plugs
+
+		if attributes is None:
+			rows = nodes._iterKeyablePlugs()
+		else:
+			names = [attributes] if isinstance( attributes, str ) else list( attributes )
+			rows  = nodes._iterPlugs( names )
+
+		names, sizes, values, nodePlugs = [], [], [], []
+		others, otherPlugs              = {}, {}
+
+		for nodeName, (typeName, row) in zip( nodes.nodeNames, rows ):
+			for plug in row:
+				if plug is None:
+					continue
+
+				codec = plugs.getCodec( plug, typeName )
+
+				if codec is None or isinstance( codec, plugs.MessageCodec ):
+					continue
+
+				name = nodeName +"."+ plug.partialName( *_plugNameArgs )
+
+				if codec.size is None:
+					others[ name ]     = codec.get( plug )
+					otherPlugs[ name ] = plug, codec
+				else:
+					value = codec.get( plug )
+
+					if codec.size == 1:
+						values.append( value )
+					else:
+						values.extend( value )
+
+					names.append( name )
+					sizes.append( codec.size )
+					nodePlugs.append( (plug, codec) )
+
+		pose = Pose( names, sizes, values, others )
+		pose._plugs      = nodePlugs
+		pose._otherPlugs = otherPlugs
+
+		return pose
+
+	def __getstate__( self ):
+		return self._names, self._sizes, self._values, self._others
+
+	def __setstate__( self, state ):
+		self._names, self._sizes, self._values, self._others = state
+		self._plugs      = None
+		self._otherPlugs = None
+
+	def __len__( self ):
+		return len(self._names) + len(self._others)
+
+	def __repr__( self ):
+		return "<Pose of %d plugs>" % len(self)
+
+	def __contains__( self, name ):
+		return name in self._others or name in self._names
+
+	def __getitem__( self, name ):
+		"""Returns the captured value of a plug by "node.attribute" name."""
+		if name in self._others:
+			return self._others[ name ]
+
+		try:
+			i = self._names.index( name )
+		except ValueError:
+			raise KeyError( "Pose has not plug '%s'." % name )
+
+		start = self._offsets[i]
+
+		if self._sizes[i] == 1:
+			return float( self._values[ start ] )
+
+		return self._values[ start:start + self._sizes[i] ].tolist()
+
+	@property
+	def names( self ):
+		"""Returns the names of the numeric plugs, in the order of their values."""
+		return list( self._names )
+
+	@property
+	def values( self ):
+		"""Returns the numpy buffer with the numeric values."""
+		return self._values
+
+	@property
+	def others( self ):
+		"""Returns a dict with the values that are not numeric, by plug name."""
+		return dict( self._others )
+
+	@property
+	def _offsets( self ):
+		return np.cumsum( self._sizes ) - self._sizes
+
+	def apply( self, skipMissing=False ):
+		"""Sets the captured values in one MDGModifier and one undo step, or queues them in the current Modifier.
+		Raises a KeyError if some plug doesn't exist anymore, unless skipMissing is True."""
+		from .modifier import Modifier
+
+		nodePlugs, otherPlugs = self._getPlugs( skipMissing )
+
+		values  = self._values.tolist()
+		offsets = self._offsets.tolist()
+		sizes   = self._sizes.tolist()
+
+		with Modifier.ensure() as modifier:
+			for (plug, codec), start, size in zip( nodePlugs, offsets, sizes ):
+				if plug is not None:
+					modifier.setValue( plug, codec, values[ start ] if size == 1 else values[ start:start + size ] )
+
+			for name, value in self._others.items():
+				plug, codec = otherPlugs[ name ]
+
+				if plug is not None:
+					modifier.setValue( plug, codec, value )
+
+	def _getPlugs( self, skipMissing ):
+		"""Returns the list of (plug, codec) pairs of the numeric values and the dict with the pairs of the other values
+		by name, resolving the names if needed."""
+
+		if self._plugs is not None:
+			return self._plugs, self._otherPlugs
+
+		missing    = []
+		nodePlugs  = [Pose._findPlug( name, missing ) for name in self._names]
+		otherPlugs = dict( (name, Pose._findPlug( name, missing )) for name in self._others )
+
+		if not missing:
+			self._plugs      = nodePlugs
+			self._otherPlugs = otherPlugs
+		elif not skipMissing:
+			raise KeyError( "Plugs %s don't exist." % missing )
+
+		return nodePlugs, otherPlugs
+
+	@staticmethod
+	def _findPlug( name, missing ):
+		import maya.api.OpenMaya as om
+		from . import plugs
+
+		sel = om.MSelectionList()
+
+		try:
+			sel.add( name )
+			plug = sel.getPlug( 0 )
+		except (RuntimeError, TypeError):
+			missing.append( name )
+			return None, None
+
+		return plug, plugs.getCodec( plug, om.MFnDependencyNode( plug.node() ).typeName )
+
+	def _align( self, other ):
+		"""Returns the indices of the plugs in both poses that are in the two of them, and their value indices."""
+
+		if self._names == other._names and np.array_equal( self._sizes, other._sizes ):
+			plugIndices = np.arange( len(self._names) )
+			return plugIndices, plugIndices, np.arange( len(self._values) ), np.arange( len(other._values) )
+
+		index = dict( (name, j) for j, name in enumerate( other._names ) )
+		a, b  = [], []
+
+		for i, name in enumerate( self._names ):
+			j = index.get( name )
+
+			if j is not None and self._sizes[i] == other._sizes[j]:
+				a.append( i )
+				b.append( j )
+
+		a = np.array( a, dtype=np.intp )
+		b = np.array( b, dtype=np.intp )
+
+		return a, b, self._getValueIndices( a ), other._getValueIndices( b )
+
+	def _getValueIndices( self, plugIndices ):
+		"""Returns the indices in the buffer of the values of the plugs."""
+		sizes  = self._sizes[ plugIndices ]
+		starts = np.repeat( self._offsets[ plugIndices ], sizes )
+		steps  = np.arange( sizes.sum() ) - np.repeat( np.cumsum( sizes ) - sizes, sizes )
+
+		return starts + steps
+
+	def _withValues( self, plugIndices, values ):
+		"""Returns a new pose with the plugs of the indices and the values, keeping the resolved plugs."""
+		pose = Pose( [self._names[i] for i in plugIndices], self._sizes[ plugIndices ], values )
+
+		if self._plugs is not None:
+			pose._plugs      = [self._plugs[i] for i in plugIndices]
+			pose._otherPlugs = {}
+
+		return pose
+
+	def diff( self, other ):
+		"""Returns a pose with the differences of the numeric values of this pose minus the other one,
+		for the plugs that are in both poses."""
+		a, b, va, vb = self._align( other )
+		return self._withValues( a, self._values[ va ] - other._values[ vb ] )
+
+	def blend( self, other, weight ):
+		"""Returns a pose interpolated linearly from this pose, at weight 0, to the other one, at weight 1.
+		Only has the numeric plugs that are in both poses. weight can also be an array with one weight per value."""
+		a, b, va, vb = self._align( other )
+		values       = self._values[ va ]
+
+		return self._withValues( a, values + ( other._values[ vb ] - values ) * weight )
+
+	def changed( self, other, tolerance=1e-6 ):
+		"""Returns the names of the plugs in both poses whose values differ more than the tolerance."""
+		a, b, va, vb = self._align( other )
+
+		different = np.abs( self._values[ va ] - other._values[ vb ] ) > tolerance
+		owners    = np.repeat( a, self._sizes[ a ] )
+
+		return [self._names[i] for i in np.unique( owners[ different ] )]
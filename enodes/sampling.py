@@ -0,0 +1,57 @@
+"""
+Evaluation of plugs at many times under a MDGContext, without changing the current time.
+"""
+
+import numpy             as np
+import maya.api.OpenMaya as om
+
+def frameRange( start, end, step=1.0 ):
+	"""Returns a numpy array with the times from start to end, both included."""
+	count = int( np.floor( ( end - start ) / float(step) + 1e-6 ) ) + 1
+	return start + np.arange( max( count, 0 ) ) * step
+
+def _iterTimes( times ):
+	"""Yields the index of every time while the dependency graph is evaluated at it. Times are in ui units."""
+	unit = om.MTime.uiUnit()
+
+	for i, time in enumerate( times ):
+		with om.MDGContextGuard( om.MDGContext( om.MTime( float(time), unit ) ) ):
+			yield i
+
+def sampleRows( rows, sizes, times ):
+	"""Evaluates rows of (plug, codec) pairs at every time and returns an array shaped (F, len(rows), sum(sizes)).
+	sizes is the number of values of every column and missing plugs, None, get NaN."""
+	offsets = [sum( sizes[:j] ) for j in range( len(sizes) )]
+	columns = list( zip( offsets, sizes ) )
+	values  = np.full( ( len(times), len(rows), sum(sizes) ), np.nan )
+
+	for f in _iterTimes( times ):
+		frame = values[f]
+
+		for i, items in enumerate( rows ):
+			for (plug, codec), (offset, size) in zip( items, columns ):
+				if plug is None:
+					continue
+
+				if size == 1:
+					frame[ i, offset ] = codec.get( plug )
+				else:
+					frame[ i, offset:offset + size ] = codec.get( plug )
+
+	return values
+
+def sampleAttributes( attributes, times ):
+	"""Evaluates the NodeAttributes at every time and returns an array shaped (F, k), where k is the total
+	number of values of the attributes. Raises a TypeError if some attribute is not numeric."""
+	items = []
+
+	for attribute in attributes:
+		codec = attribute._getCodec()
+
+		if codec is None or codec.size is None:
+			raise TypeError( "Attribute '%s' is not numeric." % attribute )
+
+		items.append( (attribute.MPlug, codec) )
+
+	values = sampleRows( [items], [codec.size for plug, codec in items], times )
+	return values[ :, 0, : ]
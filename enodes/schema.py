@@ -0,0 +1,121 @@
+"""
+Attribute metadata shared by all the nodes of the same type.
+"""
+
+import maya.cmds         as mc
+import maya.api.OpenMaya as om
+
+from . import plugs
+
+class AttributeSchema(object):
+	"""Metadata of an attribute, computed the first time it is requested.
+	Static attributes have one schema per node type and dynamic attributes one per node."""
+
+	__slots__ = ( '_MObject', '_values' )
+
+	def __init__( self, mObject ):
+		self._MObject = mObject
+		self._values  = {}
+
+	def _get( self, key, compute ):
+		try:
+			return self._values[ key ]
+		except KeyError:
+			value = self._values[ key ] = compute()
+			return value
+
+	@property
+	def MObject( self ):
+		return self._MObject
+
+	@property
+	def name( self ):
+		return self._get( 'name', lambda: om.MFnAttribute( self._MObject ).name )
+
+	@property
+	def shortName( self ):
+		return self._get( 'shortName', lambda: om.MFnAttribute( self._MObject ).shortName )
+
+	@property
+	def isProxy( self ):
+		return self._get( 'isProxy', lambda: om.MFnAttribute( self._MObject ).isProxyAttribute )
+
+	@property
+	def minValue( self ):
+		return self._get( 'minValue', lambda: _getLimit( self._MObject, 'hasMin', 'getMin' ) )
+
+	@property
+	def maxValue( self ):
+		return self._get( 'maxValue', lambda: _getLimit( self._MObject, 'hasMax', 'getMax' ) )
+
+	def niceName( self, attribute ):
+		"""Returns the nice name like cmds.attributeName( nice=True ). Attribute is the NodeAttribute to query,
+		see _getForPlug."""
+		return self._getForPlug( 'niceName', attribute, lambda: mc.attributeName( str(attribute), nice=True ) )
+
+	def type( self, attribute ):
+		"""Returns the type like cmds.getAttr( type=True ). Attribute is the NodeAttribute to query, see _getForPlug."""
+		return self._getForPlug( 'type', attribute, lambda: mc.getAttr( str(attribute), type=True ) )
+
+	def _getForPlug( self, key, attribute, compute ):
+		"""Like _get, but array elements and aliased plugs are queried every time,
+		as their result depends on the plug and not only on the attribute."""
+
+		if _isPlugSpecific( attribute.MPlug ):
+			return compute()
+
+		return self._get( key, compute )
+
+	def codec( self, plug ):
+		"""Returns the codec of the plug, the same codec plugs.getCodec returns for static attributes."""
+		return self._get( 'codec', lambda: plugs.getCodec( plug, om.MFnDependencyNode( plug.node() ).typeName ) )
+
+def _isPlugSpecific( plug ):
+	"""Returns True if the plug is an array element, or the child of one, or has an alias, or its attribute is
+	generic, whose type depends on the data of the plug."""
+
+	if _isGeneric( plug.attribute() ) or om.MFnDependencyNode( plug.node() ).plugsAlias( plug ):
+		return True
+
+	while not plug.isElement:
+		if not plug.isChild:
+			return False
+
+		plug = plug.parent()
+
+	return True
+
+def _isGeneric( attribute ):
+	"""Returns True for generic attributes and typed attributes that accept any type of data."""
+
+	if attribute.hasFn( om.MFn.kGenericAttribute ):
+		return True
+
+	return attribute.hasFn( om.MFn.kTypedAttribute ) and om.MFnTypedAttribute( attribute ).attrType() in ( om.MFnData.kAny, om.MFnData.kInvalid )
+
+def _getLimit( mObject, has, get ):
+	"""Returns the minimum or maximum value in ui units, None if the attribute has no limit."""
+
+	if mObject.hasFn( om.MFn.kEnumAttribute ):
+		fn = om.MFnEnumAttribute( mObject )
+	elif mObject.hasFn( om.MFn.kUnitAttribute ):
+		fn = om.MFnUnitAttribute( mObject )
+	elif mObject.hasFn( om.MFn.kNumericAttribute ):
+		fn = om.MFnNumericAttribute( mObject )
+	else:
+		return None
+
+	if hasattr( fn, has ) and not getattr( fn, has )():
+		return None
+
+	value = getattr( fn, get )()
+
+	# Numeric compounds return one value per child
+	if isinstance( value, (tuple, list) ):
+		value = value[0]
+
+	# MAngle, MDistance and MTime
+	if hasattr( value, 'asUnits' ):
+		value = value.asUnits( value.uiUnit() )
+
+	return value
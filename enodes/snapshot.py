@@ -0,0 +1,295 @@
+"""
+Immutable snapshots of the scene, or of a list of nodes, stored in numpy arrays.
+Snapshots are captured in maya but can be pickled and used without it, e.g. from other threads or processes.
+"""
+
+import collections
+import numpy as np
+
+SceneDiff = collections.namedtuple( "SceneDiff", "added removed renamed reparented connected disconnected changed" )
+SceneDiff.__doc__ = """Changes between two snapshots. added and removed are node names, renamed (old, new) name pairs,
+reparented the names of the nodes with other parent, connected and disconnected ("source", "destination") plug names
+and changed a dict with the names of the nodes whose value changed by attribute column."""
+
+class SceneSnapshot(object):
+	"""Table of nodes with their names, UUIDs, instance numbers, type names and type ids, the index of the DAG
+	parent of every node (-1 for nodes without parent in the snapshot), the connections between the nodes as
+	an edge list of node indices with the names of the attributes, and columns of attribute values by name.
+	The arrays are read only. Nodes are identified by UUID and instance number to compare snapshots, see keys."""
+
+	__slots__ = ( '_names', '_uuids', '_instances', '_types', '_typeIds', '_parents', '_edges', '_edgeAttributes', '_columns',
+		'_baseKeys', '_keys' )
+
+	def __init__( self, names, uuids, instances, types, typeIds, parents, edges=None, edgeAttributes=None, columns=None ):
+		self._names          = SceneSnapshot._freeze( np.array( names, dtype=str ) )
+		self._uuids          = SceneSnapshot._freeze( np.array( uuids, dtype=str ) )
+		self._instances      = SceneSnapshot._freeze( np.array( instances, dtype=np.int32 ) )
+		self._types          = SceneSnapshot._freeze( np.array( types, dtype=str ) )
+		self._typeIds        = SceneSnapshot._freeze( np.array( typeIds, dtype=np.int64 ) )
+		self._parents        = SceneSnapshot._freeze( np.array( parents, dtype=np.int32 ) )
+		self._edges          = SceneSnapshot._freeze( np.array( edges if edges is not None else [], dtype=np.int32 ).reshape( -1, 2 ) )
+		self._edgeAttributes = SceneSnapshot._freeze( np.array( edgeAttributes if edgeAttributes is not None else [], dtype=str ).reshape( -1, 2 ) )
+		self._columns        = dict( (name, SceneSnapshot._freeze( np.array( values, dtype=np.float64 ) )) for name, values in (columns or {}).items() )
+		self._baseKeys       = None
+		self._keys           = None
+
+		count = len(self._names)
+
+		for array in ( self._uuids, self._instances, self._types, self._typeIds, self._parents ):
+			if len(array) != count:
+				raise ValueError( "Expected %d values by node, got %d." % (count, len(array)) )
+
+		if len(self._edges) != len(self._edgeAttributes):
+			raise ValueError( "Expected the attributes of %d edges, got %d." % (len(self._edges), len(self._edgeAttributes)) )
+
+		for name, values in self._columns.items():
+			if len(values) != count:
+				raise ValueError( "Expected %d values in column '%s', got %d." % (count, name, len(values)) )
+
+	@staticmethod
+	def _freeze( array ):
+		array.flags.writeable = False
+		return array
+
+	@staticmethod
+	def capture( nodes=None, attributes=() ):
+		"""Captures the nodes of a NodeList, or all the nodes of the scene, in a single pass. DAG nodes have a row
+		by path, instances included. attributes are the names of the numeric attributes stored as columns, with NaN
+		for the nodes without them. Only the connections between nodes of the snapshot are stored. Requires maya."""
+		import maya.api.OpenMaya as om
+		from .node import NodeList, _IdentityMap, _iterDagPaths, _iterDependencyNodes
+		from . import utils
+
+		if nodes is None:
+			sel = om.MSelectionList()
+
+			for mObject, mDagPath in _iterDagPaths():
+				sel.add( mDagPath, False )
+
+			for mObject, mDagPath in _iterDependencyNodes():
+				if mDagPath is None:
+					sel.add( mObject, False )
+
+			nodes = NodeList.fromMSelectionList( sel )
+
+		fn    = om.MFnDependencyNode()
+		items = list( utils.iter_MSelectionList( nodes._MSelectionList, nodes._indices ) )
+		rows  = _IdentityMap()
+		paths = {}
+
+		names, uuids, instances, types, typeIds = [], [], [], [], []
+
+		for i, (mObject, mDagPath) in enumerate( items ):
+			fn.setObject( mObject )
+
+			if mDagPath is not None:
+				name = mDagPath.fullPathName()
+				paths[ name ] = i
+				instances.append( mDagPath.instanceNumber() )
+			else:
+				name = fn.name()
+				instances.append( 0 )
+
+			rows.add( mObject, None, i )
+			names.append( name )
+			uuids.append( fn.uuid().asString() )
+			types.append( fn.typeName )
+			typeIds.append( fn.typeId.id() )
+
+		parents = [paths.get( name.rpartition('|')[0], -1 ) if mDagPath is not None else -1
+			for name, (mObject, mDagPath) in zip( names, items )]
+
+		edges, edgeAttributes = [], []
+		nameArgs              = ( False, False, True, False, True, True )
+
+		for i, (mObject, mDagPath) in enumerate( items ):
+			# Instances share the connections, they are listed for the first row of the node
+			if rows.get( mObject, None ) != i:
+				continue
+
+			fn.setObject( mObject )
+
+			for plug in fn.getConnections():
+				if not plug.isDestination:
+					continue
+
+				source = plug.sourceWithConversion()
+				j      = rows.get( source.node(), None )
+
+				if j is not None:
+					edges.append( (j, i) )
+					edgeAttributes.append( (source.partialName( *nameArgs ), plug.partialName( *nameArgs )) )
+
+		columns = dict( (name, nodes.getAttr( name )) for name in attributes )
+
+		return SceneSnapshot( names, uuids, instances, types, typeIds, parents, edges, edgeAttributes, columns )
+
+	def __getstate__( self ):
+		return ( self._names, self._uuids, self._instances, self._types, self._typeIds, self._parents,
+			self._edges, self._edgeAttributes, self._columns )
+
+	def __setstate__( self, state ):
+		self.__init__( *state )
+
+	def __len__( self ):
+		return len(self._names)
+
+	def __repr__( self ):
+		return "<SceneSnapshot of %d nodes and %d connections>" % ( len(self._names), len(self._edges) )
+
+	@property
+	def names( self ):
+		"""Full path names of DAG nodes and names of the other nodes."""
+		return self._names
+
+	@property
+	def uuids( self ):
+		return self._uuids
+
+	@property
+	def instances( self ):
+		return self._instances
+
+	@property
+	def types( self ):
+		return self._types
+
+	@property
+	def typeIds( self ):
+		return self._typeIds
+
+	@property
+	def parents( self ):
+		"""Index of the DAG parent of every node, -1 if the node has no parent in the snapshot."""
+		return self._parents
+
+	@property
+	def edges( self ):
+		"""Array shaped (E, 2) with the indices of the source and the destination node of every connection."""
+		return self._edges
+
+	@property
+	def edgeAttributes( self ):
+		"""Array shaped (E, 2) with the attribute names of the source and the destination of every connection."""
+		return self._edgeAttributes
+
+	@property
+	def columns( self ):
+		"""Dict with the attribute values of the nodes by attribute name."""
+		return dict( self._columns )
+
+	@property
+	def keys( self ):
+		"""Unique key of every node, used to match the nodes of two snapshots. Keys are the UUID and the instance number,
+		but UUIDs are not unique, e.g. the nodes of a file referenced twice share them. Repeated keys add the namespace
+		of the node, and the name if they are still repeated."""
+		if self._keys is None:
+			self._keys = SceneSnapshot._freeze( self._getKeys() )
+
+		return self._keys
+
+	def _getBaseKeys( self ):
+		"""Returns the UUID and instance number keys, that may be repeated."""
+		if self._baseKeys is None:
+			self._baseKeys = SceneSnapshot._freeze( np.char.add( np.char.add( self._uuids, "/" ), self._instances.astype( str ) ) )
+
+		return self._baseKeys
+
+	def _getKeys( self, ambiguous=() ):
+		"""Returns the keys of the nodes, adding the namespace to the repeated keys and to the ones in ambiguous."""
+		keys     = self._getBaseKeys()
+		repeated = np.union1d( _getRepeated( keys ), np.asarray( ambiguous, dtype=str ) )
+
+		if len(repeated):
+			mask = np.isin( keys, repeated )
+			keys = _addSuffix( keys, mask, [_getNamespace( name ) for name in self._names[ mask ].tolist()] )
+
+			# Nodes with the same UUID in the same namespace
+			mask = np.isin( keys, _getRepeated( keys ) )
+
+			if mask.any():
+				keys = _addSuffix( keys, mask, self._names[ mask ].tolist() )
+
+		return keys
+
+	def index( self, name ):
+		"""Returns the index of the node by name."""
+		found = np.flatnonzero( self._names == name )
+
+		if not len(found):
+			raise KeyError( "Snapshot has not node '%s'." % name )
+
+		return int( found[0] )
+
+	def ofType( self, type ):
+		"""Returns the indices of the nodes of the type name. Derived types are not included."""
+		return np.flatnonzero( self._types == type )
+
+	def children( self, index ):
+		"""Returns the indices of the DAG children of the node."""
+		return np.flatnonzero( self._parents == index )
+
+	def _getEdgeKeys( self, keys ):
+		return np.char.add( np.char.add( np.char.add( np.char.add( keys[ self._edges[:, 0] ], "." ), self._edgeAttributes[:, 0] ), ">" ),
+			np.char.add( np.char.add( keys[ self._edges[:, 1] ], "." ), self._edgeAttributes[:, 1] ) )
+
+	def _getEdgeNames( self, mask ):
+		edges      = self._edges[ mask ]
+		attributes = self._edgeAttributes[ mask ]
+
+		return [( "%s.%s" % (self._names[s], sa), "%s.%s" % (self._names[d], da) )
+			for (s, d), (sa, da) in zip( edges.tolist(), attributes.tolist() )]
+
+	def diff( self, other ):
+		"""Returns a SceneDiff with the changes from this snapshot to the other one.
+		Keys repeated in any of the two snapshots are disambiguated by namespace in both of them."""
+		ambiguous       = np.union1d( _getRepeated( self._getBaseKeys() ), _getRepeated( other._getBaseKeys() ) )
+		keys, otherKeys = self._getKeys( ambiguous ), other._getKeys( ambiguous )
+		common, a, b    = np.intersect1d( keys, otherKeys, return_indices=True )
+
+		added   = other._names[ ~np.isin( otherKeys, keys ) ].tolist()
+		removed = self._names[ ~np.isin( keys, otherKeys ) ].tolist()
+
+		renamedMask = self._names[a] != other._names[b]
+		renamed     = list( zip( self._names[a][ renamedMask ].tolist(), other._names[b][ renamedMask ].tolist() ) )
+
+		parents      = np.where( self._parents[a] >= 0, keys[ self._parents[a] ], "" )
+		otherParents = np.where( other._parents[b] >= 0, otherKeys[ other._parents[b] ], "" )
+		reparented   = other._names[b][ parents != otherParents ].tolist()
+
+		edges, otherEdges = self._getEdgeKeys( keys ), other._getEdgeKeys( otherKeys )
+		connected         = other._getEdgeNames( ~np.isin( otherEdges, edges ) )
+		disconnected      = self._getEdgeNames( ~np.isin( edges, otherEdges ) )
+
+		changed = {}
+
+		for name in set( self._columns ) & set( other._columns ):
+			values, otherValues = self._columns[ name ][a], other._columns[ name ][b]
+
+			if values.shape != otherValues.shape:
+				changed[ name ] = other._names[b].tolist()
+				continue
+
+			different = ~( ( values == otherValues ) | ( np.isnan( values ) & np.isnan( otherValues ) ) )
+
+			if different.ndim > 1:
+				different = different.any( axis=tuple( range( 1, different.ndim ) ) )
+
+			changed[ name ] = other._names[b][ different ].tolist()
+
+		return SceneDiff( added, removed, renamed, reparented, connected, disconnected, changed )
+
+def _getRepeated( keys ):
+	"""Returns the keys that are more than once in the array."""
+	unique, counts = np.unique( keys, return_counts=True )
+	return unique[ counts > 1 ]
+
+def _getNamespace( name ):
+	return name.rpartition( "|" )[2].rpartition( ":" )[0]
+
+def _addSuffix( keys, mask, suffixes ):
+	"""Returns the keys with "/" and the suffixes added to the keys of the mask."""
+	ends         = np.full( len(keys), "", dtype=object )
+	ends[ mask ] = ["/" + suffix for suffix in suffixes]
+
+	return np.char.add( keys, ends.astype( str ) )
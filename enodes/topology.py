@@ -0,0 +1,229 @@
+"""
+Topology of meshes as numpy arrays, computed once per mesh and cached until the topology changes.
+"""
+
+import itertools
+import collections
+import numpy as np
+
+_cache     = collections.OrderedDict()
+_cacheSize = [32]
+
+def setCacheSize( size ):
+	"""Sets the number of meshes whose topology is kept, the least recently used ones are removed first."""
+	_cacheSize[0] = size
+	_evict()
+
+def clearCache():
+	"""Removes the topology of all the meshes and their callbacks."""
+	while _cache:
+		_cache.popitem()[1]._removeCallbacks()
+
+def getTopology( mesh ):
+	"""Returns the MeshTopology of the MeshNode, from the cache while its topology doesn't change."""
+	key      = mesh._MObjectHandle.hashCode()
+	topology = _cache.pop( key, None )
+
+	if topology is not None and ( topology._dirty or not topology._isTopologyOf( mesh ) ):
+		topology._removeCallbacks()
+		topology = None
+
+	if topology is None:
+		topology = MeshTopology( mesh )
+		topology._addCallbacks()
+
+	_cache[ key ] = topology
+	_evict()
+
+	return topology
+
+def _getCellKeys( cells ):
+	"""Returns the integer cell coordinates shaped (V, 3) as single values of 24 bytes, to sort and search them."""
+	return np.ascontiguousarray( cells ).view( np.dtype( (np.void, 24) ) ).ravel()
+
+def _evict():
+	while len(_cache) > max( _cacheSize[0], 0 ):
+		_cache.popitem( last=False )[1]._removeCallbacks()
+
+def _toArray( array ):
+	return np.fromiter( array, dtype=np.int64, count=len(array) )
+
+def _getCSR( keys, values, count ):
+	"""Returns the offsets and the values sorted by key, where the values of key i are values[offsets[i]:offsets[i+1]]."""
+	order   = np.lexsort( ( values, keys ) )
+	offsets = np.zeros( count + 1, dtype=np.int64 )
+
+	np.cumsum( np.bincount( keys, minlength=count ), out=offsets[1:] )
+
+	return offsets, values[ order ]
+
+class MeshTopology(object):
+	"""Faces, edges and adjacency of a mesh in numpy arrays. Lists of lists are stored in CSR format, an array of
+	offsets and an array of values, so the values of the item i are values[offsets[i]:offsets[i+1]].
+	Everything but the faces is computed the first time it is requested. Edges are the sorted vertex pairs of
+	the faces, in ascending order, and don't follow the edge indices of maya."""
+
+	__slots__ = ( '_mesh', '_handle', '_callbacks', '_dirty', '_vertexCount', '_faceCounts', '_faceOffsets',
+		'_faceVertices', '_values' )
+
+	def __init__( self, mesh ):
+		import maya.api.OpenMaya as om
+
+		counts, vertices = mesh.MFnMesh.getVertices()
+
+		self._mesh         = mesh
+		self._handle       = om.MObjectHandle( mesh._MObject )
+		self._callbacks    = []
+		self._dirty        = False
+		self._vertexCount  = mesh.MFnMesh.numVertices
+		self._faceCounts   = _toArray( counts )
+		self._faceVertices = _toArray( vertices )
+		self._faceOffsets  = np.concatenate( ( [0], np.cumsum( self._faceCounts ) ) )
+		self._values       = {}
+
+	def _isTopologyOf( self, mesh ):
+		return self._handle.isValid() and self._handle.object() == mesh._MObject
+
+	def _addCallbacks( self ):
+		import maya.api.OpenMaya as om
+
+		mObject = self._mesh._MObject
+
+		self._callbacks = [
+			om.MPolyMessage.addPolyTopologyChangedCallback( mObject, self._onTopologyChanged ),
+			om.MNodeMessage.addAttributeChangedCallback( mObject, self._onAttributeChanged ),
+		]
+
+	def _removeCallbacks( self ):
+		if self._callbacks:
+			import maya.api.OpenMaya as om
+
+			om.MMessage.removeCallbacks( self._callbacks )
+			self._callbacks = []
+
+	def _onTopologyChanged( self, *args ):
+		self._dirty = True
+
+	def _onAttributeChanged( self, message, plug, otherPlug, clientData ):
+		import maya.api.OpenMaya as om
+
+		# A new or a removed input mesh can have other topology
+		if message & ( om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken ):
+			if om.MFnAttribute( plug.attribute() ).name == "inMesh":
+				self._dirty = True
+
+	def _get( self, key, compute ):
+		try:
+			return self._values[ key ]
+		except KeyError:
+			value = self._values[ key ] = compute()
+			return value
+
+	@property
+	def vertexCount( self ):
+		return self._vertexCount
+
+	@property
+	def faceCounts( self ):
+		"""Number of vertices of every face."""
+		return self._faceCounts
+
+	@property
+	def faceOffsets( self ):
+		"""Offsets of the faces in faceVertices, with the total number of face vertices at the end."""
+		return self._faceOffsets
+
+	@property
+	def faceVertices( self ):
+		"""Vertex indices of all the faces."""
+		return self._faceVertices
+
+	@property
+	def edges( self ):
+		"""Array shaped (E, 2) with the vertices of every edge."""
+		return self._get( "edges", self._computeEdges )
+
+	def _computeEdges( self ):
+		vertices = self._faceVertices
+		counts   = self._faceCounts
+		offsets  = self._faceOffsets
+
+		# The next vertex of the last vertex of every face is the first one
+		following = np.arange( 1, len(vertices) + 1 )
+		following[ offsets[1:][ counts > 0 ] - 1 ] = offsets[:-1][ counts > 0 ]
+
+		pairs = np.sort( np.column_stack( ( vertices, vertices[ following ] ) ), axis=1 )
+		return np.unique( pairs, axis=0 )
+
+	@property
+	def vertexNeighbors( self ):
+		"""Offsets and indices, in CSR format, of the vertices connected by an edge to every vertex."""
+		return self._get( "vertexNeighbors", self._computeVertexNeighbors )
+
+	def _computeVertexNeighbors( self ):
+		edges = self.edges
+		keys  = np.concatenate( ( edges[:, 0], edges[:, 1] ) )
+		other = np.concatenate( ( edges[:, 1], edges[:, 0] ) )
+
+		return _getCSR( keys, other, self._vertexCount )
+
+	@property
+	def vertexFaces( self ):
+		"""Offsets and indices, in CSR format, of the faces of every vertex."""
+		return self._get( "vertexFaces", self._computeVertexFaces )
+
+	def _computeVertexFaces( self ):
+		faces = np.repeat( np.arange( len(self._faceCounts) ), self._faceCounts )
+		return _getCSR( self._faceVertices, faces, self._vertexCount )
+
+	def neighbors( self, vertex ):
+		"""Returns the vertices connected by an edge to the vertex."""
+		offsets, values = self.vertexNeighbors
+		return values[ offsets[ vertex ]:offsets[ vertex + 1 ] ]
+
+	def faces( self, vertex ):
+		"""Returns the faces of the vertex."""
+		offsets, values = self.vertexFaces
+		return values[ offsets[ vertex ]:offsets[ vertex + 1 ] ]
+
+	def symmetry( self, axis=0, tolerance=1e-4 ):
+		"""Returns an array with the vertex at the mirrored position of every vertex across the plane of the axis,
+		0, 1 or 2 for x, y or z, in object space. Vertices without a mirrored one get -1.
+		It is computed from the current positions and cached like the topology, so deformations don't update it."""
+		return self._get( ( "symmetry", axis, tolerance ), lambda: self._computeSymmetry( axis, tolerance ) )
+
+	def _computeSymmetry( self, axis, tolerance ):
+		"""Finds the closest vertex to every mirrored position, if it is within the tolerance. The vertices are put in
+		a grid of cells of the size of the tolerance, so each position is only compared with the 27 cells around it."""
+		points = self._mesh.getPoints()
+
+		if not len(points):
+			return np.zeros( 0, dtype=np.int64 )
+
+		mirrored = points.copy()
+		mirrored[:, axis] *= -1
+
+		keys       = _getCellKeys( np.floor( points / tolerance ).astype( np.int64 ) )
+		order      = np.argsort( keys, kind="stable" )
+		sortedKeys = keys[ order ]
+		cells      = np.floor( mirrored / tolerance ).astype( np.int64 )
+
+		result   = np.full( len(points), -1, dtype=np.int64 )
+		distance = np.full( len(points), np.inf )
+
+		for offset in itertools.product( (-1, 0, 1), repeat=3 ):
+			targets = _getCellKeys( cells + offset )
+			start   = np.searchsorted( sortedKeys, targets, side="left" )
+			end     = np.searchsorted( sortedKeys, targets, side="right" )
+
+			# Cells usually have one vertex at most, but coincident vertices share it
+			for j in range( int( ( end - start ).max() ) ):
+				rows       = np.flatnonzero( start + j < end )
+				candidates = order[ start[ rows ] + j ]
+				distances  = ( ( points[ candidates ] - mirrored[ rows ] ) ** 2 ).sum( axis=1 )
+				closer     = ( distances <= tolerance * tolerance ) & ( distances < distance[ rows ] )
+
+				result[ rows[ closer ] ]   = candidates[ closer ]
+				distance[ rows[ closer ] ] = distances[ closer ]
+
+		return result
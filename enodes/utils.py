@@ -1,26 +1,52 @@
 from maya import cmds
 from maya.api.OpenMaya import MSelectionList
 
-def iter_MObjectAndMDagPath( *names ):
+def get_MSelectionList( names, skipMissing=False, missing=None ):
+    """Adds all the names or wildcard patterns to a single MSelectionList.
+    Missing names raise a ValueError, unless skipMissing is True or a missing list is given to collect them.
+    Like any MSelectionList repeated items are merged. Components and plugs, like "pCube1.vtx[0:5]" or "pCube1.tx",
+    are replaced by their nodes."""
+
+    sel        = MSelectionList()
+    components = False
 
-    sel = MSelectionList()
-	
     for name in names:
         try:
             sel.add( name )
         except RuntimeError:
-            raise ValueError( "Node '%s' doesn't exists." % name )
-        
-        mObject = sel.getDependNode(0)
-        try:
-            mDagPath = sel.getDagPath(0)
+            if missing is not None:
+                missing.append( name )
+            elif not skipMissing:
+                raise ValueError( "Node '%s' doesn't exists." % name )
+        else:
+            components = components or '.' in name
+
+    return get_nodesOnly( sel ) if components else sel
 
-            yield mObject, mDagPath
+def get_nodesOnly( sel ):
+    """Returns a MSelectionList with the nodes of the items of the selection list, without components and plugs."""
+
+    nodes = MSelectionList()
+
+    for mObject, mDagPath in iter_MSelectionList( sel ):
+        nodes.add( mDagPath if mDagPath is not None else mObject )
+
+    return nodes
+
+def iter_MSelectionList( sel, indices=None ):
+    """Yields the MObject and the MDagPath (None for dependency nodes) of the items of the selection list."""
+
+    for i in indices if indices is not None else range( sel.length() ):
+        mObject = sel.getDependNode(i)
+        try:
+            yield mObject, sel.getDagPath(i)
         except TypeError:
             # Object is not a DagPath
             yield mObject, None
 
-        sel.remove(0)
+def iter_MObjectAndMDagPath( *names, **kwargs ):
+    """Resolves all the names in one pass. Accepts the same keyword arguments than get_MSelectionList."""
+    return iter_MSelectionList( get_MSelectionList( names, **kwargs ) )
 
 def iter_MPlugs( *plugs_names ):
 
@@ -0,0 +1,26 @@
+"""
+Tests that use maya run with mayapy, the rest are skipped without it:
+
+	mayapy -m pytest tests
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir ) )
+
+@pytest.fixture( scope="session" )
+def maya():
+	"""Initializes maya standalone once and returns maya.cmds."""
+	standalone = pytest.importorskip( "maya.standalone" )
+	standalone.initialize()
+
+	import maya.cmds
+	return maya.cmds
+
+@pytest.fixture
+def scene( maya ):
+	"""Returns maya.cmds with a new empty scene."""
+	maya.file( new=True, force=True )
+	return maya
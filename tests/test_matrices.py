@@ -0,0 +1,79 @@
+import pytest
+
+np = pytest.importorskip( "numpy" )
+
+def getWorldMatrix( mc, node ):
+	return np.array( mc.xform( node, q=True, matrix=True, worldSpace=True ) ).reshape( 4, 4 )
+
+def createTarget( mc ):
+	"""Returns the world matrix of a rotated, scaled and sheared transform."""
+	target = mc.createNode( "transform" )
+	mc.setAttr( target +".translate", 1, 2, 3 )
+	mc.setAttr( target +".rotate", 30, -45, 60 )
+	mc.setAttr( target +".scale", 1.5, 0.5, 2 )
+	mc.setAttr( target +".shear", 0.2, 0, 0.1 )
+
+	return getWorldMatrix( mc, target )
+
+def createParent( mc, type="transform" ):
+	parent = mc.createNode( type )
+	mc.setAttr( parent +".translate", -2, 1, 0.5 )
+	mc.setAttr( parent +".rotate", 10, 20, 30 )
+	mc.setAttr( parent +".scale", 2, 2, 0.5 )
+
+	return parent
+
+def checkRoundTrip( mc, node, matrix ):
+	from enodes import NodeList
+
+	nodes = NodeList( [node] )
+	nodes.setMatrices( matrix )
+
+	assert np.allclose( nodes.getMatrices()[0], matrix, atol=1e-6 )
+	assert np.allclose( getWorldMatrix( mc, node ), matrix, atol=1e-6 )
+
+def test_transform_with_pivots_and_rotate_axis( scene ):
+	target = createTarget( scene )
+	node   = scene.createNode( "transform", parent=createParent( scene ) )
+
+	scene.setAttr( node +".rotateOrder", 4 )
+	scene.setAttr( node +".rotateAxis", 15, 25, -35 )
+	scene.setAttr( node +".rotatePivot", 0.5, -1, 2 )
+	scene.setAttr( node +".scalePivot", -0.25, 1, 0.75 )
+	scene.setAttr( node +".rotatePivotTranslate", 0.1, 0.2, 0.3 )
+
+	checkRoundTrip( scene, node, target )
+
+def test_joint_with_orient_and_rotate_axis( scene ):
+	target = createTarget( scene )
+	parent = createParent( scene, "joint" )
+	node   = scene.createNode( "joint", parent=parent )
+
+	scene.connectAttr( parent +".scale", node +".inverseScale" )
+	scene.setAttr( node +".jointOrient", 20, -30, 40 )
+	scene.setAttr( node +".rotateAxis", 5, 10, 15 )
+
+	checkRoundTrip( scene, node, target )
+
+def test_local_matrix( scene ):
+	from enodes import NodeList
+
+	node   = scene.createNode( "joint", parent=createParent( scene ) )
+	matrix = np.eye( 4 )
+	matrix[3, :3] = 1, 2, 3
+
+	scene.setAttr( node +".jointOrient", 0, 90, 0 )
+
+	nodes = NodeList( [node] )
+	nodes.setMatrices( matrix, space="local" )
+
+	assert np.allclose( nodes.getMatrices( space="local" )[0], matrix, atol=1e-6 )
+
+def test_joint_with_pivots_raises( scene ):
+	from enodes import NodeList
+
+	node = scene.createNode( "joint" )
+	scene.setAttr( node +".rotatePivot", 1, 0, 0 )
+
+	with pytest.raises( ValueError ):
+		NodeList( [node] ).setMatrices( createTarget( scene ) )
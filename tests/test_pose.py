@@ -0,0 +1,79 @@
+import pickle
+import pytest
+
+np = pytest.importorskip( "numpy" )
+
+from enodes.pose import Pose
+
+def createPose( values, others=None ):
+	"""values is a list of (name, value) pairs, value a float or a list of floats."""
+	names  = [name for name, value in values]
+	sizes  = [len(value) if isinstance( value, list ) else 1 for name, value in values]
+	buffer = []
+
+	for name, value in values:
+		buffer.extend( value if isinstance( value, list ) else [value] )
+
+	return Pose( names, sizes, buffer, others )
+
+def test_pickle():
+	pose = createPose( [( "a.tx", 1.0 ), ( "a.t", [1.0, 2.0, 3.0] )], { "a.label": "left" } )
+	copy = pickle.loads( pickle.dumps( pose ) )
+
+	assert copy.names == ["a.tx", "a.t"]
+	assert copy.values.tolist() == [1.0, 1.0, 2.0, 3.0]
+	assert copy.others == { "a.label": "left" }
+	assert copy["a.tx"] == 1.0
+	assert copy["a.t"] == [1.0, 2.0, 3.0]
+	assert copy["a.label"] == "left"
+	assert len(copy) == 3
+
+def test_values_must_match_sizes():
+	with pytest.raises( ValueError ):
+		Pose( ["a.t"], [3], [1.0, 2.0] )
+
+def test_diff_of_aligned_poses():
+	a = createPose( [( "a.tx", 3.0 ), ( "a.t", [1.0, 2.0, 3.0] )] )
+	b = createPose( [( "a.tx", 1.0 ), ( "a.t", [1.0, 0.0, 5.0] )] )
+
+	diff = a.diff( b )
+
+	assert diff.names == ["a.tx", "a.t"]
+	assert diff.values.tolist() == [2.0, 0.0, 2.0, -2.0]
+
+def test_diff_aligns_by_name():
+	a = createPose( [( "a.tx", 3.0 ), ( "a.t", [1.0, 2.0, 3.0] ), ( "b.ry", 4.0 )] )
+	b = createPose( [( "c.tz", 9.0 ), ( "a.t", [0.0, 0.0, 1.0] ), ( "a.tx", 1.0 )] )
+
+	diff = a.diff( b )
+
+	assert diff.names == ["a.tx", "a.t"]
+	assert diff.values.tolist() == [2.0, 1.0, 2.0, 2.0]
+
+def test_different_sizes_are_not_aligned():
+	a = createPose( [( "a.t", [1.0, 2.0, 3.0] ), ( "a.tx", 1.0 )] )
+	b = createPose( [( "a.t", 1.0 ), ( "a.tx", 2.0 )] )
+
+	assert a.diff( b ).names == ["a.tx"]
+
+def test_blend():
+	a = createPose( [( "a.tx", 0.0 ), ( "a.t", [0.0, 2.0, 4.0] )] )
+	b = createPose( [( "a.t", [2.0, 2.0, 0.0] ), ( "a.tx", 10.0 )] )
+
+	assert a.blend( b, 0.0 ).values.tolist() == [0.0, 0.0, 2.0, 4.0]
+	assert a.blend( b, 1.0 ).values.tolist() == [10.0, 2.0, 2.0, 0.0]
+	assert a.blend( b, 0.5 ).values.tolist() == [5.0, 1.0, 2.0, 2.0]
+	assert a.blend( b, np.array( [1.0, 0.0, 0.0, 0.5] ) ).values.tolist() == [10.0, 0.0, 2.0, 2.0]
+
+def test_changed():
+	a = createPose( [( "a.tx", 1.0 ), ( "a.t", [1.0, 2.0, 3.0] ), ( "a.ry", 5.0 )] )
+	b = createPose( [( "a.tx", 1.0 + 1e-9 ), ( "a.t", [1.0, 2.5, 3.0] ), ( "a.ry", 6.0 )] )
+
+	assert a.changed( b ) == ["a.t", "a.ry"]
+	assert a.changed( b, tolerance=1.0 ) == []
+
+def test_blend_of_pickled_poses():
+	a = pickle.loads( pickle.dumps( createPose( [( "a.tx", 2.0 )] ) ) )
+	b = pickle.loads( pickle.dumps( createPose( [( "a.tx", 4.0 )] ) ) )
+
+	assert a.blend( b, 0.25 )["a.tx"] == 2.5
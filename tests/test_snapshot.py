@@ -0,0 +1,74 @@
+import pickle
+import pytest
+
+np = pytest.importorskip( "numpy" )
+
+from enodes.snapshot import SceneSnapshot
+
+def createSnapshot( nodes, edges=(), columns=None ):
+	"""nodes are (name, uuid, parent index) tuples. edges are (source, destination, source attr, destination attr)."""
+	names, uuids, parents = zip( *nodes ) if nodes else ( [], [], [] )
+
+	return SceneSnapshot( names, uuids, [0] * len(names), ["transform"] * len(names), [0] * len(names), parents,
+		[(s, d) for s, d, sa, da in edges], [(sa, da) for s, d, sa, da in edges], columns )
+
+def pickled( snapshot ):
+	return pickle.loads( pickle.dumps( snapshot ) )
+
+def test_diff_of_pickled_snapshots():
+	before = createSnapshot(
+		[( "|root", "u0", -1 ), ( "|root|a", "u1", 0 ), ( "|b", "u2", -1 ), ( "c", "u3", -1 )],
+		[( 1, 2, "tx", "tx" )],
+		{ "tx": [0.0, 1.0, 2.0, np.nan] } )
+
+	after = createSnapshot(
+		[( "|root", "u0", -1 ), ( "|a", "u1", -1 ), ( "|renamed", "u2", -1 ), ( "d", "u4", -1 )],
+		[( 2, 1, "ty", "ty" )],
+		{ "tx": [0.0, 1.0, 5.0, np.nan] } )
+
+	diff = pickled( before ).diff( pickled( after ) )
+
+	assert diff.added        == ["d"]
+	assert diff.removed      == ["c"]
+	assert diff.renamed      == [( "|root|a", "|a" ), ( "|b", "|renamed" )]
+	assert diff.reparented   == ["|a"]
+	assert diff.connected    == [( "|renamed.ty", "|a.ty" )]
+	assert diff.disconnected == [( "|root|a.tx", "|b.tx" )]
+	assert diff.changed      == { "tx": ["|renamed"] }
+
+def test_pickled_snapshot_is_read_only():
+	snapshot = pickled( createSnapshot( [( "a", "u0", -1 )], columns={ "tx": [1.0] } ) )
+
+	assert snapshot.names.tolist() == ["a"]
+	assert not snapshot.names.flags.writeable
+	assert not snapshot.columns["tx"].flags.writeable
+
+def test_repeated_uuids_are_matched_by_namespace():
+	# A file referenced twice, its nodes share the UUIDs
+	nodes  = [( "r1:a", "u0", -1 ), ( "r2:a", "u0", -1 )]
+	before = createSnapshot( nodes, columns={ "tx": [1.0, 2.0] } )
+	after  = createSnapshot( nodes, columns={ "tx": [1.0, 5.0] } )
+
+	assert len( set( before.keys.tolist() ) ) == 2
+
+	diff = pickled( before ).diff( pickled( after ) )
+
+	assert diff.added   == []
+	assert diff.removed == []
+	assert diff.changed == { "tx": ["r2:a"] }
+
+def test_repeated_uuids_in_one_snapshot():
+	before = createSnapshot( [( "r1:a", "u0", -1 )], columns={ "tx": [1.0] } )
+	after  = createSnapshot( [( "r1:a", "u0", -1 ), ( "r2:a", "u0", -1 )], columns={ "tx": [3.0, 1.0] } )
+
+	diff = before.diff( after )
+
+	assert diff.added   == ["r2:a"]
+	assert diff.removed == []
+	assert diff.changed == { "tx": ["r1:a"] }
+
+def test_repeated_uuids_in_the_same_namespace():
+	nodes = [( "|a", "u0", -1 ), ( "|b", "u0", -1 )]
+	diff  = createSnapshot( nodes, columns={ "tx": [1.0, 2.0] } ).diff( createSnapshot( nodes, columns={ "tx": [1.0, 3.0] } ) )
+
+	assert diff.changed == { "tx": ["|b"] }
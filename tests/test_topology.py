@@ -0,0 +1,61 @@
+import pytest
+
+np = pytest.importorskip( "numpy" )
+
+from enodes.topology import MeshTopology
+
+class Mesh(object):
+	"""Stands for a MeshNode, with the points in object space."""
+
+	def __init__( self, points ):
+		self._points = np.asarray( points, dtype=float )
+
+	def getPoints( self ):
+		return self._points
+
+def createTopology( counts, vertices, points ):
+	"""Builds the topology from arrays, without the MFnMesh and the callbacks of a maya mesh."""
+	topology = MeshTopology.__new__( MeshTopology )
+
+	topology._mesh         = Mesh( points )
+	topology._callbacks    = []
+	topology._dirty        = False
+	topology._vertexCount  = len(points)
+	topology._faceCounts   = np.asarray( counts, dtype=np.int64 )
+	topology._faceVertices = np.asarray( vertices, dtype=np.int64 )
+	topology._faceOffsets  = np.concatenate( ( [0], np.cumsum( topology._faceCounts ) ) )
+	topology._values       = {}
+
+	return topology
+
+def createQuad():
+	# Two triangles sharing the edge from 0 to 2
+	return createTopology( [3, 3], [0, 1, 2, 0, 2, 3], [( 0, 0, 0 ), ( 1, 0, 0 ), ( 1, 1, 0 ), ( 0, 1, 0 )] )
+
+def test_edges():
+	assert createQuad().edges.tolist() == [[0, 1], [0, 2], [0, 3], [1, 2], [2, 3]]
+
+def test_vertex_neighbors():
+	topology = createQuad()
+	offsets, values = topology.vertexNeighbors
+
+	assert offsets.tolist() == [0, 3, 5, 8, 10]
+	assert [topology.neighbors( i ).tolist() for i in range( 4 )] == [[1, 2, 3], [0, 2], [0, 1, 3], [0, 2]]
+
+def test_vertex_faces():
+	topology = createQuad()
+	offsets, values = topology.vertexFaces
+
+	assert offsets.tolist() == [0, 2, 3, 5, 6]
+	assert [topology.faces( i ).tolist() for i in range( 4 )] == [[0, 1], [0], [0, 1], [1]]
+
+def test_symmetry_across_cells():
+	# The first pair was missed at this tolerance, the mirrored positions of the second pair fall in the next cell
+	topology = createTopology( [], [], [( 0.50015, 0, 0 ), ( -0.50014, 0, 0 ), ( 0.49995, 1, 0 ), ( -0.50004, 1, 0 )] )
+
+	assert topology.symmetry( 0, 1e-4 ).tolist() == [1, 0, 3, 2]
+
+def test_symmetry_without_mirrored_vertex():
+	topology = createTopology( [], [], [( 1, 0, 0 ), ( -2, 0, 0 ), ( 0, 1, 0 )] )
+
+	assert topology.symmetry( 0, 1e-4 ).tolist() == [-1, -1, 2]
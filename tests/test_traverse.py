@@ -0,0 +1,69 @@
+def createChain( mc, count, prefix="chain" ):
+	"""Returns the names of count transforms, each one with its translateX connected to the next one."""
+	names = [mc.createNode( "transform", name="%s%d" % (prefix, i) ) for i in range( count )]
+
+	for source, destination in zip( names, names[1:] ):
+		mc.connectAttr( source +".tx", destination +".tx" )
+
+	return names
+
+def getNames( nodes ):
+	return [str( node ) for node in nodes]
+
+def test_depth_zero_returns_nothing( scene ):
+	from enodes import Node
+
+	names = createChain( scene, 4 )
+
+	assert getNames( Node( names[-1] ).upstream( depth=0 ) ) == []
+	assert getNames( Node( names[0] ).downstream( depth=0 ) ) == []
+
+def test_depth_one_returns_direct_connections( scene ):
+	from enodes import Node
+
+	names = createChain( scene, 4 )
+
+	assert getNames( Node( names[-1] ).upstream( depth=1 ) ) == [names[-2]]
+	assert getNames( Node( names[0] ).downstream( depth=1 ) ) == [names[1]]
+
+def test_depth_limits_levels( scene ):
+	from enodes import Node
+
+	names = createChain( scene, 4 )
+
+	assert set( getNames( Node( names[-1] ).upstream( depth=2, order="breadth" ) ) ) == set( names[1:3] )
+	assert set( getNames( Node( names[-1] ).upstream() ) ) == set( names[:-1] )
+
+def test_list_depth_one( scene ):
+	from enodes import NodeList
+
+	names = createChain( scene, 5 )
+	nodes = NodeList( [names[0], names[-1]] )
+
+	assert set( getNames( nodes.downstream( depth=1 ) ) ) == set( [names[1]] )
+	assert set( getNames( nodes.upstream( depth=1 ) ) ) == set( [names[-2]] )
+
+def test_list_without_depth( scene ):
+	from enodes import NodeList
+
+	a = createChain( scene, 3, "a" )
+	b = createChain( scene, 3, "b" )
+
+	# The first root has inputs
+	nodes = NodeList( [a[-1], b[-1]] )
+
+	assert set( getNames( nodes.upstream() ) ) == set( a[:-1] + b[:-1] )
+	assert set( getNames( nodes.upstream( order="breadth" ) ) ) == set( a[:-1] + b[:-1] )
+
+def test_depth_uses_the_shortest_connection( scene ):
+	from enodes import Node
+
+	# root <- x <- y and root <- y
+	root, x, y = [scene.createNode( "transform", name=name ) for name in ( "root", "x", "y" )]
+	scene.connectAttr( y +".tx", x +".tx" )
+	scene.connectAttr( x +".tx", root +".tx" )
+	scene.connectAttr( y +".ty", root +".ty" )
+
+	for order in ( "depth", "breadth" ):
+		assert set( getNames( Node( root ).upstream( depth=1, order=order ) ) ) == set( [x, y] )
+		assert set( getNames( Node( y ).downstream( depth=1, order=order ) ) ) == set( [x, root] )